@@ -1,6 +1,3 @@
-from __future__ import unicode_literals
-
-
 # The version of CloudPuff.
 #
 # This is in the format of:
@@ -1,5 +1,3 @@
-from __future__ import unicode_literals
-
 import os
 import sys
 
@@ -31,13 +29,13 @@ class CompileTemplate(BaseCommand):
             sys.stderr.write('Template error: %s\n' % e)
             sys.exit(1)
 
-        dumped = compiler.to_json()
+        dumped = compiler.to_json(pretty=True)
 
         if self.options.dest_filename:
             dirname = os.path.dirname(self.options.dest_filename)
 
             if not os.path.exists(dirname):
-                os.makedirs(dirname, 0755)
+                os.makedirs(dirname, 0o755)
 
             try:
                 with open(self.options.dest_filename, 'w') as fp:
@@ -47,7 +45,7 @@ class CompileTemplate(BaseCommand):
                                  % (self.options.dest_filename, e))
                 sys.exit(1)
         else:
-            print dumped
+            print(dumped)
 
 
 def main():
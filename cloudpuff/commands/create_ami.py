@@ -1,5 +1,3 @@
-from __future__ import print_function, unicode_literals
-
 import os
 import re
 import sys
@@ -7,15 +5,11 @@ import textwrap
 import time
 from datetime import datetime
 
-import six
-
-from cloudpuff.ami import AMICreator
-from cloudpuff.cloudformation import CloudFormation
 from cloudpuff.commands import BaseCommand, run_command
 from cloudpuff.errors import StackCreationError
 from cloudpuff.templates import TemplateCompiler
 from cloudpuff.templates.errors import TemplateError, TemplateSyntaxError
-from cloudpuff.utils.console import prompt_template_param
+from cloudpuff.utils.console import prompt_template_params
 
 
 class CreateAMI(BaseCommand):
@@ -60,6 +54,19 @@ class CreateAMI(BaseCommand):
             default=[],
             action='append',
             help='The parameter to pass to the template, as key=value')
+        parser.add_argument(
+            '--edit-params',
+            action='store_true',
+            default=False,
+            help='Fill in all parameters at once in the editor set in '
+                 '$VISUAL or $EDITOR, instead of being prompted for each.')
+        parser.add_argument(
+            '--remember-params',
+            action='store_true',
+            default=False,
+            help='Remember the values entered for parameters, and offer them '
+                 'the next time this template is used. Values for NoEcho '
+                 'parameters are never remembered.')
         parser.add_argument(
             '--template',
             metavar='FILENAME',
@@ -100,10 +107,15 @@ class CreateAMI(BaseCommand):
             sys.stderr.write('\n')
             sys.exit(1)
 
+        # boto is slow to import, so it's only loaded once it's needed,
+        # rather than when the command starts up.
+        from cloudpuff.cloudformation import CloudFormation
+
         cf = CloudFormation(self.options.region)
 
         result = cf.validate_template(template_body)
-        params = dict(self._get_template_params(result.template_parameters))
+        params = dict(self._get_template_params(result.template_parameters,
+                                                compiler.no_echo_params))
 
         print()
         print('Creating the CloudFormation stack.')
@@ -147,6 +159,8 @@ class CreateAMI(BaseCommand):
             for output in stack.outputs
         )
 
+        from cloudpuff.ami import AMICreator
+
         id_map = {}
         now = datetime.now()
         datestamp = now.strftime('%Y-%m-%d')
@@ -158,7 +172,7 @@ class CreateAMI(BaseCommand):
             # Ensure that the keys we expect to find in Outputs all exist.
             valid_ami_info = True
 
-            for output_id in six.itervalues(ami_output_keys):
+            for output_id in ami_output_keys.values():
                 if output_id not in outputs:
                     sys.stderr.write(textwrap.fill(
                         'Could not create AMI for "%s". Output '
@@ -211,7 +225,7 @@ class CreateAMI(BaseCommand):
         with open(filename, 'r') as fp:
             content = fp.read()
 
-        for orig_id, new_id in six.iteritems(id_map):
+        for orig_id, new_id in id_map.items():
             content = content.replace(orig_id, new_id)
 
         with open(filename, 'w') as fp:
@@ -253,7 +267,7 @@ class CreateAMI(BaseCommand):
             lambda m: name_format_vars[m.group(1)],
             name_format)
 
-    def _get_template_params(self, template_parameters):
+    def _get_template_params(self, template_parameters, no_echo_params):
         """Return values for all needed template parameters.
 
         Any parameters needed by the template that weren't provided on the
@@ -266,11 +280,20 @@ class CreateAMI(BaseCommand):
             for param in self.options.params
         )
 
-        for template_param in template_parameters:
-            key = template_param.parameter_key
-
-            if key not in params:
-                params[key] = prompt_template_param(template_param)
+        if self.options.remember_params:
+            remember_scope = os.path.abspath(self.options.template)
+        else:
+            remember_scope = None
+
+        params.update(prompt_template_params(
+            [
+                template_param
+                for template_param in template_parameters
+                if template_param.parameter_key not in params
+            ],
+            remember_scope=remember_scope,
+            no_echo_params=no_echo_params,
+            use_editor=self.options.edit_params))
 
         return list(params.items())
 
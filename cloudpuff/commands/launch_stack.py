@@ -1,20 +1,16 @@
-from __future__ import print_function, unicode_literals
-
 import os
 import sys
 import textwrap
 from datetime import datetime
 
-import six
 from colorama import Fore, Style
 
-from cloudpuff.cloudformation import CloudFormation
 from cloudpuff.commands import BaseCommand, run_command
 from cloudpuff.errors import (StackCreationError, StackUpdateError,
                               StackUpdateNotRequired)
 from cloudpuff.templates import TemplateCompiler
 from cloudpuff.templates.errors import TemplateError, TemplateSyntaxError
-from cloudpuff.utils.console import prompt_template_param
+from cloudpuff.utils.console import prompt_template_params
 
 
 class LaunchStack(BaseCommand):
@@ -52,6 +48,19 @@ class LaunchStack(BaseCommand):
             default=[],
             action='append',
             help='The parameter to pass to the template, as key=value')
+        parser.add_argument(
+            '--edit-params',
+            action='store_true',
+            default=False,
+            help='Fill in all parameters at once in the editor set in '
+                 '$VISUAL or $EDITOR, instead of being prompted for each.')
+        parser.add_argument(
+            '--remember-params',
+            action='store_true',
+            default=False,
+            help='Remember the values entered for parameters, and offer them '
+                 'the next time this template is used. Values for NoEcho '
+                 'parameters are never remembered.')
         parser.add_argument(
             '--template',
             metavar='FILENAME',
@@ -85,6 +94,10 @@ class LaunchStack(BaseCommand):
 
         generic_stack_name = compiler.meta['Name']
 
+        # boto is slow to import, so it's only loaded once it's needed,
+        # rather than when the command starts up.
+        from cloudpuff.cloudformation import CloudFormation
+
         self.cf = CloudFormation(self.options.region)
         result = self.cf.validate_template(template_body)
         template_params = result.template_parameters
@@ -121,14 +134,15 @@ class LaunchStack(BaseCommand):
 
             params = self._get_template_params(
                 template_params,
-                ignore_params=list(compiler.stack_param_lookups.keys()))
+                ignore_params=list(compiler.stack_param_lookups.keys()),
+                no_echo_params=compiler.no_echo_params)
 
             if self.options.keep_params:
                 # Add any existing stack parameters to the list here. Only
                 # include those that exist in the current template.
                 params.update(dict(
                     (param_key, param_value)
-                    for param_key, param_value in six.iteritems(stack_params)
+                    for param_key, param_value in stack_params.items()
                     if param_key in template_param_keys
                 ))
 
@@ -166,7 +180,8 @@ class LaunchStack(BaseCommand):
             params = self._get_template_params(
                 template_params,
                 ignore_params=list(compiler.stack_param_lookups.keys()),
-                required_params=compiler.required_params)
+                required_params=compiler.required_params,
+                no_echo_params=compiler.no_echo_params)
             params = self._lookup_stack_params(params, compiler)
 
             print('Creating the CloudFormation stack.')
@@ -209,7 +224,7 @@ class LaunchStack(BaseCommand):
                           datetime.now().strftime('%Y%m%d%H%M%S'))
 
     def _get_template_params(self, template_parameters, ignore_params=[],
-                             required_params=None):
+                             required_params=None, no_echo_params=None):
         """Return values for all needed template parameters.
 
         Any parameters needed by the template that weren't provided on the
@@ -231,6 +246,10 @@ class LaunchStack(BaseCommand):
                 parameter name and each value is a boolean indicating if it's
                 required.
 
+            no_echo_params (set, optional):
+                The names of parameters marked ``NoEcho``, whose values
+                won't be remembered.
+
         Returns:
             dict:
             The resulting parameters.
@@ -240,13 +259,22 @@ class LaunchStack(BaseCommand):
             for param in self.options.params
         )
 
-        for template_param in template_parameters:
-            param_name = template_param.parameter_key
-
-            if param_name not in params and param_name not in ignore_params:
-                params[param_name] = prompt_template_param(
-                    template_param,
-                    required=required_params[param_name])
+        if self.options.remember_params:
+            remember_scope = os.path.abspath(self.options.template)
+        else:
+            remember_scope = None
+
+        params.update(prompt_template_params(
+            [
+                template_param
+                for template_param in template_parameters
+                if (template_param.parameter_key not in params and
+                    template_param.parameter_key not in ignore_params)
+            ],
+            required_params=required_params,
+            remember_scope=remember_scope,
+            no_echo_params=no_echo_params,
+            use_editor=self.options.edit_params))
 
         return params
 
@@ -270,7 +298,7 @@ class LaunchStack(BaseCommand):
 
         # Go through all external stack parameter lookups requested by this
         # template, and try to find the appropriate stacks.
-        for param_name, lookup_info in six.iteritems(stack_param_lookups):
+        for param_name, lookup_info in stack_param_lookups.items():
             stack_name = lookup_info['StackName']
             required_tags = {
                 'GenericStackName': stack_name,
@@ -279,7 +307,7 @@ class LaunchStack(BaseCommand):
             for tag_name in lookup_info['MatchStackTags']:
                 required_tags[tag_name] = params[tag_name]
 
-            key = tuple(six.iteritems(required_tags))
+            key = tuple(required_tags.items())
 
             if key not in stack_outputs:
                 # We don't have anything for this stack yet, so try to find
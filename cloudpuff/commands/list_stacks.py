@@ -1,18 +1,20 @@
-from __future__ import print_function, unicode_literals
-
 import json
 import os
 import sys
 from datetime import datetime
 
-import six
 from colorama import Fore, Style
 
-from cloudpuff.cloudformation import CloudFormation
 from cloudpuff.commands import BaseCommand, run_command
 from cloudpuff.errors import StackCreationError
 from cloudpuff.templates import TemplateCompiler
-from cloudpuff.utils.console import prompt_template_param
+
+
+# Styles and indentation strings used when printing fields. These are
+# computed once, rather than for every printed field.
+_BRIGHT = Style.BRIGHT
+_RESET = Style.RESET_ALL
+_INDENTS = tuple(i * '    ' for i in range(8))
 
 
 class ListStacks(BaseCommand):
@@ -35,6 +37,14 @@ class ListStacks(BaseCommand):
             help='Limit results to the given stack name(s).')
 
     def main(self):
+        # Colors would only be stripped back out when not writing to a
+        # terminal, so we skip them entirely in that case.
+        self._use_color = sys.stdout.isatty()
+
+        # boto is slow to import, so it's only loaded once it's needed,
+        # rather than when the command starts up.
+        from cloudpuff.cloudformation import CloudFormation
+
         cf = CloudFormation(self.options.region)
 
         stacks = cf.lookup_stacks()
@@ -56,12 +66,25 @@ class ListStacks(BaseCommand):
     def _print_stacks_json(self, stacks):
         """Print the list of stacks as pretty-printed JSON.
 
+        Each stack is serialized and written as it's processed, rather than
+        building and serializing the full list of stacks at once.
+
         Args:
             stacks (list of boto.cloudformation.stack.Stack):
                 List of stacks to print.
         """
-        print(json.dumps(
-            [
+        first = True
+
+        sys.stdout.write('[')
+
+        for stack in stacks:
+            if first:
+                first = False
+                sys.stdout.write('\n  ')
+            else:
+                sys.stdout.write(',\n  ')
+
+            data = json.dumps(
                 {
                     'name': stack.stack_name,
                     'status': stack.stack_status,
@@ -69,30 +92,42 @@ class ListStacks(BaseCommand):
                     'arn': stack.stack_id,
                     'created': stack.creation_time.isoformat(),
                     'tags': stack.tags,
-                    'outputs': dict(
-                        (output.key, output.value)
-                        for output in stacks
-                    ),
-                }
-                for stack in stacks
-            ],
-            indent=2))
+                    'outputs': {
+                        output.key: output.value
+                        for output in stack.outputs
+                    },
+                },
+                indent=2)
+
+            # Nest the serialized stack within the list. Newlines within
+            # strings are always escaped, so these are only ever between
+            # lines of JSON.
+            sys.stdout.write(data.replace('\n', '\n  '))
+
+        if first:
+            sys.stdout.write(']\n')
+        else:
+            sys.stdout.write('\n]\n')
 
     def _print_stacks(self, stacks):
         """Print the list of stacks as formatted console output.
 
+        The output is collected and written to the console in one batch,
+        rather than line-by-line.
+
         Args:
             stacks (list of boto.cloudformation.stack.Stack):
                 List of stacks to print.
         """
+        buf = []
         first = True
 
         for stack in stacks:
             if first:
                 first = False
             else:
-                print()
-                print()
+                buf.append('')
+                buf.append('')
 
             if stack.stack_status.endswith('FAILED'):
                 status_color = Fore.RED
@@ -101,33 +136,45 @@ class ListStacks(BaseCommand):
             elif stack.stack_status.endswith('PROGRESS'):
                 status_color = Fore.YELLOW
 
-            self._print_field(stack.stack_name, key_color=Fore.CYAN)
-            self._print_field('Status', stack.stack_status, indent_level=1,
-                              value_color=status_color)
-            self._print_field('Description', stack.description, indent_level=1)
-            self._print_field('ARN', stack.stack_id, indent_level=1)
-            self._print_field('Created', stack.creation_time, indent_level=1)
+            self._print_field(buf, stack.stack_name, key_color=Fore.CYAN)
+            self._print_field(buf, 'Status', stack.stack_status,
+                              indent_level=1, value_color=status_color)
+            self._print_field(buf, 'Description', stack.description,
+                              indent_level=1)
+            self._print_field(buf, 'ARN', stack.stack_id, indent_level=1)
+            self._print_field(buf, 'Created', stack.creation_time,
+                              indent_level=1)
 
             if stack.outputs:
-                self._print_field('Outputs', indent_level=1)
+                self._print_field(buf, 'Outputs', indent_level=1)
 
                 for output in stack.outputs:
-                    self._print_field(output.key, output.value, indent_level=2)
+                    self._print_field(buf, output.key, output.value,
+                                      indent_level=2)
 
             if stack.tags:
-                self._print_field('Tags', indent_level=1)
+                self._print_field(buf, 'Tags', indent_level=1)
+
+                for tag_name, tag_value in stack.tags.items():
+                    self._print_field(buf, tag_name, tag_value,
+                                      indent_level=2)
 
-                for tag_name, tag_value in six.iteritems(stack.tags):
-                    self._print_field(tag_name, tag_value, indent_level=2)
+        if buf:
+            sys.stdout.write('\n'.join(buf))
+            sys.stdout.write('\n')
 
-    def _print_field(self, key, value='', indent_level=0, key_color=None,
+    def _print_field(self, buf, key, value='', indent_level=0, key_color=None,
                      value_color=None):
-        """Print a key/value field to the console.
+        """Print a key/value field to an output buffer.
 
         The keys will be printed as bold. This has several additional options
-        for controlling presentation.
+        for controlling presentation. Styles and colors are only used when
+        writing to a terminal.
 
         Args:
+            buf (list of unicode):
+                The buffer of lines to append the field to.
+
             key (unicode):
                 The key to print.
 
@@ -143,19 +190,26 @@ class ListStacks(BaseCommand):
             value_color (unicode, optional):
                 The color code to use for the value.
         """
-        if key_color:
-            key = '%s%s%s' % (key_color, key, Style.RESET_ALL)
+        indent = _INDENTS[indent_level]
 
-        if value and value_color:
-            value = '%s%s%s' % (value_color, value, Style.RESET_ALL)
+        if not self._use_color:
+            s = '%s%s:' % (indent, key)
+
+            if value:
+                s += ' %s' % value
+        else:
+            if key_color:
+                key = '%s%s%s' % (key_color, key, _RESET)
 
-        s = '%s%s%s:%s' % (indent_level * '    ', Style.BRIGHT, key,
-                           Style.RESET_ALL)
+            s = '%s%s%s:%s' % (indent, _BRIGHT, key, _RESET)
 
-        if value:
-            s += ' %s' % value
+            if value:
+                if value_color:
+                    s += ' %s%s%s' % (value_color, value, _RESET)
+                else:
+                    s += ' %s' % value
 
-        print(s)
+        buf.append(s)
 
 
 def main():
@@ -1,5 +1,3 @@
-from __future__ import print_function, unicode_literals
-
 import sys
 
 from cloudpuff.commands import BaseCommand, run_command
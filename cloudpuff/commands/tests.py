@@ -0,0 +1,197 @@
+import io
+import json
+import sys
+import types
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import patch
+
+from colorama import Fore, Style
+
+from cloudpuff.commands.list_stacks import ListStacks
+
+
+class FakeOutput(object):
+    """A stand-in for boto's stack Output."""
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+
+class FakeStack(object):
+    """A stand-in for boto's Stack."""
+
+    def __init__(self, stack_name, stack_status, outputs=[], tags={}):
+        self.stack_name = stack_name
+        self.stack_status = stack_status
+        self.description = 'Description of %s.' % stack_name
+        self.stack_id = 'arn:aws:cloudformation:%s' % stack_name
+        self.creation_time = datetime(2016, 3, 1, 12, 30, 0)
+        self.outputs = [
+            FakeOutput(key, value)
+            for key, value in outputs
+        ]
+        self.tags = dict(tags)
+
+
+class ListStacksTests(TestCase):
+    """Unit tests for the list-stacks command."""
+
+    def setUp(self):
+        super(ListStacksTests, self).setUp()
+
+        self.stacks = [
+            FakeStack('stack1', 'CREATE_COMPLETE',
+                      outputs=[('Output1', 'value1'),
+                               ('Output2', 'value2')],
+                      tags={'Tag1': 'tag-value1'}),
+            FakeStack('stack2', 'UPDATE_IN_PROGRESS'),
+        ]
+
+    def test_json(self):
+        """Testing ListStacks with --json"""
+        output = self._run_command(['--json'])
+
+        self.assertEqual(
+            json.loads(output),
+            [
+                {
+                    'name': 'stack1',
+                    'status': 'CREATE_COMPLETE',
+                    'description': 'Description of stack1.',
+                    'arn': 'arn:aws:cloudformation:stack1',
+                    'created': '2016-03-01T12:30:00',
+                    'tags': {
+                        'Tag1': 'tag-value1',
+                    },
+                    'outputs': {
+                        'Output1': 'value1',
+                        'Output2': 'value2',
+                    },
+                },
+                {
+                    'name': 'stack2',
+                    'status': 'UPDATE_IN_PROGRESS',
+                    'description': 'Description of stack2.',
+                    'arn': 'arn:aws:cloudformation:stack2',
+                    'created': '2016-03-01T12:30:00',
+                    'tags': {},
+                    'outputs': {},
+                },
+            ])
+
+    def test_json_without_stacks(self):
+        """Testing ListStacks with --json and no stacks"""
+        self.stacks = []
+
+        self.assertEqual(json.loads(self._run_command(['--json'])), [])
+
+    def test_text(self):
+        """Testing ListStacks with text output to a terminal"""
+        bright = Style.BRIGHT
+        reset = Style.RESET_ALL
+
+        self.assertEqual(
+            self._run_command([], isatty=True).splitlines(),
+            [
+                '%s%sstack1%s:%s' % (bright, Fore.CYAN, reset, reset),
+                '    %sStatus:%s %sCREATE_COMPLETE%s'
+                % (bright, reset, Fore.GREEN, reset),
+                '    %sDescription:%s Description of stack1.'
+                % (bright, reset),
+                '    %sARN:%s arn:aws:cloudformation:stack1' % (bright, reset),
+                '    %sCreated:%s 2016-03-01 12:30:00' % (bright, reset),
+                '    %sOutputs:%s' % (bright, reset),
+                '        %sOutput1:%s value1' % (bright, reset),
+                '        %sOutput2:%s value2' % (bright, reset),
+                '    %sTags:%s' % (bright, reset),
+                '        %sTag1:%s tag-value1' % (bright, reset),
+                '',
+                '',
+                '%s%sstack2%s:%s' % (bright, Fore.CYAN, reset, reset),
+                '    %sStatus:%s %sUPDATE_IN_PROGRESS%s'
+                % (bright, reset, Fore.YELLOW, reset),
+                '    %sDescription:%s Description of stack2.'
+                % (bright, reset),
+                '    %sARN:%s arn:aws:cloudformation:stack2' % (bright, reset),
+                '    %sCreated:%s 2016-03-01 12:30:00' % (bright, reset),
+            ])
+
+    def test_text_without_tty(self):
+        """Testing ListStacks with text output when stdout is not a terminal"""
+        output = self._run_command([], isatty=False)
+
+        self.assertNotIn('\x1b', output)
+        self.assertEqual(
+            output.splitlines(),
+            [
+                'stack1:',
+                '    Status: CREATE_COMPLETE',
+                '    Description: Description of stack1.',
+                '    ARN: arn:aws:cloudformation:stack1',
+                '    Created: 2016-03-01 12:30:00',
+                '    Outputs:',
+                '        Output1: value1',
+                '        Output2: value2',
+                '    Tags:',
+                '        Tag1: tag-value1',
+                '',
+                '',
+                'stack2:',
+                '    Status: UPDATE_IN_PROGRESS',
+                '    Description: Description of stack2.',
+                '    ARN: arn:aws:cloudformation:stack2',
+                '    Created: 2016-03-01 12:30:00',
+            ])
+
+    def test_text_with_stack_names(self):
+        """Testing ListStacks with text output limited to stack names"""
+        self.assertEqual(
+            self._run_command(['stack2']).splitlines()[0],
+            'stack2:')
+
+    def test_text_without_stacks(self):
+        """Testing ListStacks with text output and no stacks"""
+        self.stacks = []
+
+        self.assertEqual(self._run_command([]), '')
+
+    def _run_command(self, args, isatty=False):
+        """Run the command against the fake stacks.
+
+        Args:
+            args (list of unicode):
+                The command line arguments.
+
+            isatty (bool, optional):
+                Whether stdout should appear to be a terminal.
+
+        Returns:
+            unicode:
+            The output of the command.
+        """
+        stacks = self.stacks
+
+        class FakeCloudFormation(object):
+            def __init__(self, region):
+                pass
+
+            def lookup_stacks(self):
+                return stacks
+
+        cloudformation = types.ModuleType('cloudpuff.cloudformation')
+        cloudformation.CloudFormation = FakeCloudFormation
+
+        stdout = io.StringIO()
+        stdout.isatty = lambda: isatty
+
+        cmd = ListStacks()
+        cmd.options = cmd.setup_options().parse_args(args)
+
+        with patch.dict(sys.modules,
+                        {'cloudpuff.cloudformation': cloudformation}), \
+             patch('sys.stdout', stdout):
+            cmd.main()
+
+        return stdout.getvalue()
@@ -1,6 +1,3 @@
-from __future__ import unicode_literals
-
-
 class InvalidTagError(Exception):
     """A tag name or value was invalid."""
 
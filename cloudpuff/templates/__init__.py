@@ -1,5 +1,3 @@
-from __future__ import unicode_literals
-
 from cloudpuff.templates.compiler import TemplateCompiler
 from cloudpuff.templates.reader import TemplateReader
 
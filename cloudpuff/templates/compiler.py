@@ -1,10 +1,5 @@
-from __future__ import unicode_literals
-
 import json
 import os
-from collections import OrderedDict
-
-import six
 
 from cloudpuff.errors import InvalidTagError
 from cloudpuff.templates.reader import TemplateReader
@@ -19,6 +14,9 @@ class TemplateCompiler(object):
 
     SECTIONS = ('Parameters', 'Mappings', 'Conditions', 'Resources', 'Outputs')
 
+    # Sections that may contain if statements to process.
+    PROCESSED_SECTIONS = ('Conditions', 'Resources')
+
     def __init__(self, for_amis=False):
         self.doc = None
         self.meta = None
@@ -26,6 +24,7 @@ class TemplateCompiler(object):
         self.ami_outputs = []
         self.stack_param_lookups = {}
         self.required_params = {}
+        self.no_echo_params = set()
 
     def load_string(self, s, stack_name=None, filename=None):
         """Load a CloudPuff template from a string.
@@ -44,6 +43,32 @@ class TemplateCompiler(object):
                 The name of the file being loaded. This is used to generate
                 more useful errors.
         """
+        reader = self._create_reader()
+        reader.load_string(s, filename=filename)
+
+        self._load_reader_doc(reader, stack_name)
+
+    def load_file(self, filename):
+        """Load a CloudPuff template from disk."""
+        generic_stack_name = \
+            '.'.join(os.path.basename(filename).split('.')[:-1])
+        generic_stack_name = generic_stack_name.replace('_', '-')
+        generic_stack_name = generic_stack_name.replace('.', '-')
+
+        reader = self._create_reader()
+
+        with open(filename, 'r') as fp:
+            reader.load_stream(fp, filename=filename)
+
+        self._load_reader_doc(reader, generic_stack_name)
+
+    def _create_reader(self):
+        """Return a new TemplateReader for loading a template.
+
+        Returns:
+            cloudpuff.templates.reader.TemplateReader:
+            The new template reader.
+        """
         reader = TemplateReader()
 
         if self.for_amis:
@@ -51,9 +76,19 @@ class TemplateCompiler(object):
         else:
             reader.template_state.variables['buildingAMIs'] = 'false'
 
-        reader.load_string(s, filename=filename)
+        return reader
+
+    def _load_reader_doc(self, reader, stack_name):
+        """Compile the document loaded by a TemplateReader.
+
+        Args:
+            reader (cloudpuff.templates.reader.TemplateReader):
+                The reader that loaded the template.
 
-        self.doc = OrderedDict()
+            stack_name (unicode):
+                The optional generic name of the stack.
+        """
+        self.doc = {}
         self.doc['AWSTemplateFormatVersion'] = '2010-09-09'
 
         self.meta = reader.doc['Meta']
@@ -67,23 +102,34 @@ class TemplateCompiler(object):
 
             self.doc['Description'] = description
 
-        for section in self.SECTIONS:
-            try:
-                self.doc[section] = reader.doc[section]
-            except KeyError:
-                self.doc[section] = OrderedDict()
-
-        # Process any if statements found, converting them to Conditions.
+        # Copy over the sections being used, processing any if statements
+        # found and converting them to Conditions. If nothing was parsed
+        # that needs processing, the sections are used as-is.
+        doc = self.doc
         template_state = reader.template_state
 
-        for section in ('Conditions', 'Resources'):
-            self.doc[section] = template_state.process_tree(
-                self.doc[section],
-                resolve_variables=False,
-                resolve_if_conditions=True)
+        for section in self.SECTIONS:
+            value = reader.doc.get(section)
+
+            if (value and
+                section in self.PROCESSED_SECTIONS and
+                template_state.needs_processing):
+                value = template_state.process_tree(
+                    value,
+                    resolve_variables=False,
+                    resolve_if_conditions=True)
+
+            if value:
+                doc[section] = value
+            elif section == 'Conditions':
+                # Conditions may still be generated from if statements in
+                # Resources, so keep its place in the template.
+                doc[section] = {}
 
         if template_state.if_conditions:
-            self.doc['Conditions'].update(template_state.if_conditions)
+            doc['Conditions'].update(template_state.if_conditions)
+        elif not doc['Conditions']:
+            del doc['Conditions']
 
         # Look for any parameters that reference outputs from other stacks.
         self._post_process_params()
@@ -92,26 +138,23 @@ class TemplateCompiler(object):
         # process.
         self._scan_cloudpuff_metadata()
 
-        # Clean up any sections not being used.
-        for section in self.SECTIONS:
-            if not self.doc[section]:
-                del self.doc[section]
+    def to_json(self, pretty=False):
+        """Return a JSON string version of the compiled template.
 
-    def load_file(self, filename):
-        """Load a CloudPuff template from disk."""
-        generic_stack_name = \
-            '.'.join(os.path.basename(filename).split('.')[:-1])
-        generic_stack_name = generic_stack_name.replace('_', '-')
-        generic_stack_name = generic_stack_name.replace('.', '-')
-
-        with open(filename, 'r') as fp:
-            self.load_string(fp.read(),
-                             stack_name=generic_stack_name,
-                             filename=filename)
+        Args:
+            pretty (bool, optional):
+                Whether to indent the JSON for readability. By default,
+                compact JSON is returned, suitable for sending to
+                CloudFormation.
 
-    def to_json(self):
-        """Return a JSON string version of the compiled template."""
-        return json.dumps(self.doc, indent=4)
+        Returns:
+            unicode:
+            The JSON string for the template.
+        """
+        if pretty:
+            return json.dumps(self.doc, indent=4, separators=(',', ': '))
+        else:
+            return json.dumps(self.doc, separators=(',', ':'))
 
     def get_tags(self, params):
         """Return a dictionary of tags for the stack.
@@ -122,27 +165,36 @@ class TemplateCompiler(object):
         This will also ``GenericStackName`` and ``Version`` tags.
 
         Args:
-            params (list):
-                A list of tuples of (key, value) for parameters.
+            params (list or dict):
+                A list of tuples of (key, value) for parameters, or a
+                dictionary mapping parameter names to values.
 
         Returns:
             dict:
             A dictionary of tags for the stack.
         """
-        params = dict(params)
+        # This will only be built from a list of parameters if a tag
+        # references a parameter.
+        param_map = None
 
         tags = {
             'GenericStackName': self.meta['Name'],
         }
 
         if 'Version' in self.meta:
-            tags['StackVersion'] = six.text_type(self.meta['Version'])
+            tags['StackVersion'] = str(self.meta['Version'])
 
-        for tag_name, tag_value in six.iteritems(self.meta.get('Tags', {})):
+        for tag_name, tag_value in self.meta.get('Tags', {}).items():
             if isinstance(tag_value, dict) and 'Ref' in tag_value:
-                tag_value = params[tag_value['Ref']]
+                if param_map is None:
+                    if isinstance(params, dict):
+                        param_map = params
+                    else:
+                        param_map = dict(params)
+
+                tag_value = param_map[tag_value['Ref']]
 
-            if not isinstance(tag_value, six.text_type):
+            if not isinstance(tag_value, str):
                 raise InvalidTagError(
                     'Invalid value "%r" for tag "%s" found in the stack '
                     'metadata.'
@@ -157,9 +209,10 @@ class TemplateCompiler(object):
 
         Any parameter containing a ``LookupFromStack`` will be specially
         tracked in :py:attr:`stack_param_lookups` so that data from those
-        parameters can be scanned from an external stack later.
+        parameters can be scanned from an external stack later. Parameters
+        marked ``NoEcho`` are tracked in :py:attr:`no_echo_params`.
         """
-        for param_name, param in six.iteritems(self.doc['Parameters']):
+        for param_name, param in self.doc.get('Parameters', {}).items():
             # Grab the data and delete it from the parameter, so that
             # CloudFormation doesn't get confused by it.
             lookup_from_stack = param.pop('LookupFromStack', None)
@@ -167,34 +220,51 @@ class TemplateCompiler(object):
             if lookup_from_stack:
                 self.stack_param_lookups[param_name] = lookup_from_stack
 
-            self.required_params[param_name] = \
-                param.pop('Required', 'true').lower() == 'true'
+            # The reader keeps the original spelling of booleans (such as
+            # "False" or "yes"), so the fast path only covers the common
+            # lowercase "true" and "false", and anything else falls back on
+            # a case-insensitive check.
+            required = param.pop('Required', 'true')
+            self.required_params[param_name] = (
+                required == 'true' or
+                (required != 'false' and required.lower() == 'true'))
+
+            # NoEcho is left in place for CloudFormation. It's tracked here
+            # as well, since boto reports every parameter as NoEcho.
+            if str(param.get('NoEcho', 'false')).lower() == 'true':
+                self.no_echo_params.add(param_name)
 
     def _scan_cloudpuff_metadata(self):
         ami_metadata = []
 
-        for resource_name, resource in six.iteritems(self.doc['Resources']):
+        for resource_name, resource in self.doc.get('Resources', {}).items():
             if (not isinstance(resource, dict) or
-                resource.get('Type') != 'AWS::EC2::Instance' or
-                'CloudPuff' not in resource.get('Metadata', {})):
+                resource.get('Type') != 'AWS::EC2::Instance'):
                 continue
 
-            metadata = resource['Metadata']['CloudPuff']
+            # Metadata may be a string or a function rather than a mapping.
+            metadata = resource.get('Metadata')
 
-            if 'AMINameFormat' in metadata:
-                ami_info = {
-                    'name_format': metadata['AMINameFormat'],
-                    'resource_name': resource_name,
-                    'resource': resource,
-                }
+            if isinstance(metadata, dict):
+                metadata = metadata.get('CloudPuff')
 
-                if 'PreviousAMI' in metadata:
-                    ami_info['previous_ami'] = metadata['PreviousAMI']
+            if (not isinstance(metadata, dict) or
+                'AMINameFormat' not in metadata):
+                continue
 
-                ami_metadata.append(ami_info)
+            ami_info = {
+                'name_format': metadata['AMINameFormat'],
+                'resource_name': resource_name,
+                'resource': resource,
+            }
+
+            if 'PreviousAMI' in metadata:
+                ami_info['previous_ami'] = metadata['PreviousAMI']
+
+            ami_metadata.append(ami_info)
 
         if ami_metadata and self.for_amis:
-            outputs = {}
+            outputs = self.doc.setdefault('Outputs', {})
 
             # Create individual outputs for each AMI we need to generate.
             for metadata in ami_metadata:
@@ -203,23 +273,23 @@ class TemplateCompiler(object):
                 instance_id_key = 'CloudPuff%sInstanceID' % resource_name
                 name_format_key = 'CloudPuff%sAMINameFormat' % resource_name
 
-                output = OrderedDict()
-                output['Description'] = 'Instance ID for %s' % resource_name
-                output['Value'] = { 'Ref': resource_name }
-                outputs[instance_id_key] = output
+                outputs[instance_id_key] = {
+                    'Description': 'Instance ID for %s' % resource_name,
+                    'Value': { 'Ref': resource_name },
+                }
 
-                output = OrderedDict()
-                output['Description'] = ('Name format for the AMI for %s'
-                                         % resource_name)
-                output['Value'] = metadata['name_format']
-                outputs[name_format_key] = output
+                outputs[name_format_key] = {
+                    'Description': ('Name format for the AMI for %s'
+                                    % resource_name),
+                    'Value': metadata['name_format'],
+                }
 
                 if 'previous_ami' in metadata:
-                    output = OrderedDict()
-                    output['Description'] = ('Previous AMI ID created for %s'
-                                             % resource_name)
-                    output['Value'] = metadata['previous_ami']
-                    outputs[previous_ami_key] = output
+                    outputs[previous_ami_key] = {
+                        'Description': ('Previous AMI ID created for %s'
+                                        % resource_name),
+                        'Value': metadata['previous_ami'],
+                    }
 
                 self.ami_outputs.append({
                     'resource_name': metadata['resource_name'],
@@ -229,5 +299,3 @@ class TemplateCompiler(object):
                         'name_format_key': name_format_key,
                     }
                 })
-
-            self.doc.setdefault('Outputs', {}).update(outputs)
@@ -1,7 +1,5 @@
 """Template-related errors."""
 
-from __future__ import unicode_literals
-
 
 class TemplateError(Exception):
     """Error with a CloudPuff template."""
@@ -1,5 +1,3 @@
-from __future__ import unicode_literals
-
 from collections import namedtuple
 
 
@@ -40,6 +38,12 @@ class ExpressionParser(object):
     http://eli.thegreenplace.net/2012/08/02/parsing-expressions-by-precedence-climbing
     """
 
+    # Names of tokens that map directly from a string in the expression.
+    TOKEN_NAMES = {
+        '(': 'LEFTPAREN',
+        ')': 'RIGHTPAREN',
+    }
+
     def __init__(self, pattern, ops, process_value_func, process_op_func):
         self.pattern = pattern
         self.ops = ops
@@ -72,7 +76,7 @@ class ExpressionParser(object):
         The next token will be fetched from the generator in _iter_tokens.
         """
         try:
-            self._cur_token = self._tokens.next()
+            self._cur_token = next(self._tokens)
         except StopIteration:
             self._cur_token = None
 
@@ -83,14 +87,16 @@ class ExpressionParser(object):
         provided to the ExpressionParser. It will then be turned into a
         series of Tokens.
         """
+        token_names = self.TOKEN_NAMES
+        ops = self.ops
+
         for m in self.pattern.finditer(expr):
             s = m.group(0)
+            token_name = token_names.get(s)
 
-            if s == '(':
-                yield Token('LEFTPAREN', s)
-            elif s == ')':
-                yield Token('RIGHTPAREN', s)
-            elif s in self.ops.keys():
+            if token_name is not None:
+                yield Token(token_name, s)
+            elif s in ops:
                 yield Token('OP', s)
             else:
                 if ((s.startswith('"') and s.endswith('"')) or
@@ -1,5 +1,4 @@
-from __future__ import unicode_literals
-
+import copy
 import os
 import random
 import sys
@@ -13,7 +12,24 @@ from cloudpuff.templates.state import TemplateState, VarReference
 from cloudpuff.templates.string_parser import StringParser
 
 
-class TemplateLoader(yaml.Loader):
+# Use libyaml's much faster C-based loader, if it's available.
+#
+# libyaml is stricter than the pure Python loader in one respect: a block
+# scalar whose first content line has a tab after the indentation is a
+# syntax error, rather than content starting with a tab. Templates should
+# indent block scalars with spaces only.
+BaseTemplateLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+# Cache of template states for imported files.
+#
+# This maps absolute filenames to tuples of (template state, file stamps),
+# where the file stamps map each file the state depends on to the
+# (modification time, size) it had when loaded.
+_import_cache = {}
+
+
+class TemplateLoader(BaseTemplateLoader):
     """Loads a YAML document representing a CloudFormation template.
 
     The templates function much like any standard YAML document, with
@@ -61,6 +77,7 @@ class TemplateLoader(yaml.Loader):
         super(TemplateLoader, self).__init__(*args, **kwargs)
 
         self.template_state = None
+        self._string_parser = None
 
     @classmethod
     def register_template_constructors(cls):
@@ -99,10 +116,18 @@ class TemplateLoader(yaml.Loader):
         pairs = self.construct_pairs(node)
 
         for key, value in pairs:
-            if isinstance(key, basestring) and key == '<':
-                d.update(value)
-            else:
-                d[key] = value
+            if isinstance(key, str):
+                if key == '<':
+                    d.update(value)
+                    continue
+
+                # Templates repeat the same keys (such as "Type",
+                # "Properties", or "Value") many times over. Interning them
+                # means each copy doesn't need to be kept in memory, and
+                # dictionary lookups between them can compare by identity.
+                key = sys.intern(key)
+
+            d[key] = value
 
         return d
 
@@ -120,7 +145,12 @@ class TemplateLoader(yaml.Loader):
         Any references/functions/variables found within the string will
         be converted into their appropriate statements.
         """
-        parser = StringParser(self.template_state)
+        # A single parser is shared by all strings in this loader.
+        parser = self._string_parser
+
+        if parser is None:
+            parser = StringParser(self.template_state)
+            self._string_parser = parser
 
         return parser.parse_string(node.value)
 
@@ -183,16 +213,7 @@ class TemplateLoader(yaml.Loader):
             filename = os.path.normpath(filename)
 
             self.template_state.imported_files.add(filename)
-
-            reader = TemplateReader()
-
-            try:
-                reader.load_file(filename)
-            except IOError as e:
-                raise ConstructorError('Unable to import file "%s": %s'
-                                       % (filename, e))
-
-            self.template_state.update(reader.template_state)
+            self.template_state.update(self._load_import(filename))
 
     def construct_call_macro(self, node):
         """Handle !call-macro statements.
@@ -302,9 +323,9 @@ class TemplateLoader(yaml.Loader):
         values = self.construct_mapping(node)
         tags = []
 
-        for key, value in values.iteritems():
+        for key, value in values.items():
             if not isinstance(value, (dict, VarReference)):
-                value = unicode(value)
+                value = str(value)
 
             tag = OrderedDict()
             tag['Key'] = key
@@ -313,6 +334,46 @@ class TemplateLoader(yaml.Loader):
 
         return tags
 
+    def _load_import(self, filename):
+        """Load the template state for an imported file.
+
+        The state for an imported file is cached, and will be reused as
+        long as that file, and any files it imports or embeds, haven't
+        changed. Each caller gets its own copy of the state.
+        """
+        cache_key = os.path.abspath(filename)
+
+        try:
+            template_state, stamps = _import_cache[cache_key]
+        except KeyError:
+            pass
+        else:
+            if all(_get_file_stamp(path) == stamp
+                   for path, stamp in stamps.items()):
+                return copy.deepcopy(template_state)
+
+        stamp = _get_file_stamp(filename)
+        reader = TemplateReader()
+
+        try:
+            reader.load_file(filename)
+        except IOError as e:
+            raise ConstructorError('Unable to import file "%s": %s'
+                                   % (filename, e))
+
+        template_state = reader.template_state
+
+        stamps = dict(
+            (path, _get_file_stamp(path))
+            for path in (template_state.imported_files |
+                         template_state.embedded_files)
+        )
+        stamps[filename] = stamp
+
+        _import_cache[cache_key] = (copy.deepcopy(template_state), stamps)
+
+        return template_state
+
     def _process_macro(self, macro_value, macro_name, variables):
         """Process a macro.
 
@@ -323,7 +384,7 @@ class TemplateLoader(yaml.Loader):
         try:
             return self.template_state.process_tree(macro_value, variables)
         except KeyError as e:
-            raise ConstructorError(unicode(e))
+            raise ConstructorError(str(e))
 
 
 class TemplateReader(object):
@@ -356,6 +417,30 @@ class TemplateReader(object):
                 The name of the file being loaded. This is used to generate
                 more useful errors.
 
+        Raises:
+            cloudpuff.templates.errors.TemplateSyntaxError:
+                A syntax error was found in the template.
+        """
+        self.load_stream(s, base_dir=base_dir, filename=filename)
+
+    def load_stream(self, stream, base_dir=None, filename=None):
+        """Load a template file from a string or file object.
+
+        File objects will be read by the YAML parser as it goes, rather
+        than being read into memory up-front.
+
+        Args:
+            stream (unicode or file):
+                The template string or file object to load.
+
+            base_dir (unicode, optional):
+                The base directory for this template. Imports will be made
+                relative to this directory.
+
+            filename (unicode, optional):
+                The name of the file being loaded. This is used to generate
+                more useful errors.
+
         Raises:
             cloudpuff.templates.errors.TemplateSyntaxError:
                 A syntax error was found in the template.
@@ -385,7 +470,7 @@ class TemplateReader(object):
                 self.template_state = reader.template_state
 
         try:
-            for doc in yaml.load_all(s, Loader=ReaderTemplateLoader):
+            for doc in yaml.load_all(stream, Loader=ReaderTemplateLoader):
                 if isinstance(doc, MacrosDoc):
                     self.template_state.macros.update(doc.__dict__)
                 elif isinstance(doc, VariablesDoc):
@@ -395,30 +480,133 @@ class TemplateReader(object):
                     self.doc.update(doc)
         except (yaml.parser.ParserError, yaml.scanner.ScannerError) as e:
             mark = e.problem_mark
+            code = mark.get_snippet()
+
+            if code is None:
+                # libyaml doesn't provide snippets, so build one that
+                # matches what PyYAML would show.
+                line = _get_source_line(stream, mark.line)
+
+                if line is None:
+                    code = ''
+                else:
+                    code = '    %s\n    %s^' % (line, ' ' * mark.column)
+
             raise TemplateSyntaxError(e.problem,
                                       filename=filename,
-                                      code=mark.get_snippet(),
+                                      code=code,
                                       line=mark.line + 1,
                                       column=mark.column + 1)
 
     def load_file(self, filename):
         """Load a template file from disk."""
         with open(filename, 'r') as fp:
-            self.load_string(fp.read(),
+            self.load_stream(fp,
                              base_dir=os.path.dirname(filename),
                              filename=filename)
 
     def _resolve_variables(self, reader, doc):
-        prev_unresolved_vars = None
+        """Resolve the variables defined in a "!vars" document.
+
+        Each variable is resolved only once, even if referenced by many
+        other variables. Variables referencing other variables in the
+        document are resolved first, as they're needed.
+
+        Every variable in the document is resolved, whether or not it's
+        used, so a variable referencing itself (such as ``a: $$a``) is an
+        error even if nothing references it.
+
+        Raises:
+            yaml.constructor.ConstructorError:
+                A variable references itself, directly or indirectly.
+        """
+        template_state = self.template_state
+        variables = _VariablesResolver(template_state, doc.__dict__)
+
+        return OrderedDict(
+            (template_state.process_tree(key, variables), variables[key])
+            for key in doc.__dict__
+        )
+
+
+class _VariablesResolver(dict):
+    """Resolves variables from a "!vars" document on first access.
+
+    This is passed to :py:meth:`TemplateState.process_tree` as the
+    variables for a "!vars" document. Looking up a variable will process
+    its value (resolving any variables it references in turn) and store
+    the result, so later lookups don't need to process it again.
+    """
+
+    def __init__(self, template_state, doc_tree):
+        super(_VariablesResolver, self).__init__()
+
+        self.template_state = template_state
+        self.doc_tree = doc_tree
+        self.resolving = set()
 
-        doc_tree = doc.__dict__
+    def __missing__(self, name):
+        value = self.doc_tree[name]
 
-        while prev_unresolved_vars != self.template_state.unresolved_variables:
-            doc_tree = self.template_state.process_tree(doc_tree, doc_tree)
-            prev_unresolved_vars = \
-                self.template_state.unresolved_variables.copy()
+        if name in self.resolving:
+            raise ConstructorError('Variable "%s" references itself' % name)
+
+        self.resolving.add(name)
+
+        try:
+            value = self.template_state.process_tree(value, self)
+        finally:
+            self.resolving.discard(name)
+
+        self[name] = value
+
+        return value
+
+
+def _get_source_line(source, line_num):
+    """Return a line from a template string or file object.
+
+    Args:
+        source (unicode or file):
+            The template string or file object.
+
+        line_num (int):
+            The 0-based line number to return.
+
+    Returns:
+        unicode:
+        The line, without a trailing newline, or ``None`` if it could not
+        be found.
+    """
+    if isinstance(source, str):
+        lines = source.splitlines()
+    else:
+        try:
+            source.seek(0)
+        except (AttributeError, IOError):
+            return None
+
+        lines = source
+
+    for i, line in enumerate(lines):
+        if i == line_num:
+            return line.rstrip('\r\n')
+
+    return None
+
+
+def _get_file_stamp(filename):
+    """Return a stamp used to check if a file has changed.
+
+    This is a tuple of the modification time and size of the file, or None
+    if the file doesn't exist.
+    """
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
 
-        return doc_tree
+    return (st.st_mtime_ns, st.st_size)
 
 
 class MacrosDoc(yaml.YAMLObject):
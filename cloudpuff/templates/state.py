@@ -1,9 +1,5 @@
-from __future__ import unicode_literals
-
 from collections import OrderedDict
 
-import six
-
 
 class TemplateState(object):
     """Manages the state of a template.
@@ -23,12 +19,17 @@ class TemplateState(object):
         self.base_dir = None
         self.filename = None
 
+        # Whether any If conditions or variable references have been
+        # parsed, which may need to be processed when compiling.
+        self.needs_processing = False
+
     def update(self, other_state):
         self.macros.update(other_state.macros)
         self.variables.update(other_state.variables)
         self.unresolved_variables.update(other_state.unresolved_variables)
         self.imported_files.update(other_state.imported_files)
         self.embedded_files.update(other_state.embedded_files)
+        self.needs_processing |= other_state.needs_processing
 
     def resolve(self, name, d):
         """Resolve a variable or macro name or path.
@@ -44,32 +45,59 @@ class TemplateState(object):
         return result
 
     def process_tree(self, node_value, variables=None,
-                     resolve_variables=True, resolve_if_conditions=False):
+                     resolve_variables=True, resolve_if_conditions=False,
+                     _memo=None):
         """Resolve variables found in a part of the tree.
 
         This will walk the tree and resolve any variables found. If
         a variable is referenced that does not exist, a KeyError will
         be raised.
+
+        Dictionaries and lists appearing more than once in the tree (such
+        as through YAML aliases) will only be processed once, and will share
+        the processed result. This is skipped when resolving If conditions,
+        since each appearance registers its own Conditions entry.
         """
         if variables is None:
             variables = self.variables
 
+        if _memo is None:
+            _memo = {}
+
+        if isinstance(node_value, (dict, list)) and not resolve_if_conditions:
+            memo_key = (id(node_value), resolve_variables)
+
+            try:
+                return _memo[memo_key][1]
+            except KeyError:
+                pass
+        else:
+            memo_key = None
+
         if isinstance(node_value, dict):
-            return OrderedDict(
-                (self.process_tree(key, variables, resolve_variables),
+            value = OrderedDict(
+                (self.process_tree(key, variables, resolve_variables,
+                                   _memo=_memo),
                  self.process_tree(value, variables, resolve_variables,
-                                   resolve_if_conditions))
-                for key, value in six.iteritems(node_value)
+                                   resolve_if_conditions, _memo))
+                for key, value in node_value.items()
             )
+
+            if memo_key is not None:
+                # The node is stored along with the result, keeping it alive
+                # so that its ID can't be reused by another node.
+                _memo[memo_key] = (node_value, value)
+
+            return value
         elif isinstance(node_value, list):
             value = [
                 self.process_tree(item, variables, resolve_variables,
-                                  resolve_if_conditions)
+                                  resolve_if_conditions, _memo)
                 for item in self.collapse_variables(node_value, variables)
             ]
 
             if isinstance(node_value, VarsStringsList):
-                if all(isinstance(item, basestring) for item in value):
+                if all(isinstance(item, str) for item in value):
                     value = ''.join(value)
                 else:
                     value = {
@@ -78,6 +106,9 @@ class TemplateState(object):
             elif isinstance(node_value, UncollapsibleList):
                 value = UncollapsibleList(value)
 
+            if memo_key is not None:
+                _memo[memo_key] = (node_value, value)
+
             return value
         elif resolve_variables and isinstance(node_value, VarReference):
             try:
@@ -113,7 +144,7 @@ class TemplateState(object):
         for item in l:
             if isinstance(item, VarReference):
                 has_vars = True
-            elif not isinstance(item, basestring):
+            elif not isinstance(item, str):
                 return l
 
         if has_vars:
@@ -150,7 +181,7 @@ class TemplateState(object):
                     collapse_string = can_collapse_string
                     collapse_next_string = can_collapse_string
 
-            if isinstance(item, basestring):
+            if isinstance(item, str):
                 if collapse_string and result:
                     result[-1] += item
                 else:
@@ -180,6 +211,10 @@ class IfCondition(object):
 
         return self.condition == other.condition
 
+    # Each instance is tracked separately (for instance, in
+    # TemplateState.unresolved_variables), so hash by identity.
+    __hash__ = object.__hash__
+
     def __repr__(self):
         return '<IfCondition(%r)>' % self.condition
 
@@ -200,6 +235,10 @@ class VarReference(object):
 
         return self.name == other.name
 
+    # Each instance is tracked separately (for instance, in
+    # TemplateState.unresolved_variables), so hash by identity.
+    __hash__ = object.__hash__
+
     def __repr__(self):
         return '<VarReference(%s)>' % self.name
 
@@ -1,6 +1,5 @@
-from __future__ import unicode_literals
-
 import re
+import sys
 
 from yaml.constructor import ConstructorError
 
@@ -9,14 +8,19 @@ from cloudpuff.templates.state import (IfCondition, UncollapsibleList,
                                        VarReference, VarsStringsList)
 
 
-# CloudFormation functions, optionally with opening blocks
+# CloudFormation functions, optionally with opening blocks.
+#
+# These can't span lines, so "[^\S\n]" is used to match whitespace other
+# than newlines.
+#
+# Groups are: function name, parameters, opening block.
 FUNC_RE = re.compile(
-    r'<%\s*(?P<func_name>[A-Za-z][A-Za-z0-9]+)\s*'
-    r'(\((?P<params>(.*))\))?'
-    r'(?P<func_open>\s*{)?\s*%>\n?')
+    r'<%[^\S\n]*([A-Za-z][A-Za-z0-9]+)[^\S\n]*'
+    r'(?:\((.*)\))?'
+    r'([^\S\n]*{)?[^\S\n]*%>\n?')
 
 # Closing braces for block-level CloudFormation functions
-CLOSE_FUNC_RE = re.compile(r'(?P<func_close><%\s*}\s*%>)\n?')
+CLOSE_FUNC_RE = re.compile(r'<%[^\S\n]*}[^\S\n]*%>\n?')
 
 # Resource/Parameter references
 REFERENCE_RE = re.compile(
@@ -25,28 +29,56 @@ REFERENCE_RE = re.compile(
     r'([A-Za-z0-9:_]|(?(ref_brace)(?(var_in_ref)\.)))+)'
     r'(?(ref_brace)})')
 
+# Resource/Parameter references, for use when parsing strings.
+#
+# This is equivalent to REFERENCE_RE, but avoids conditional groups, giving
+# the parser a simple group for each form of name. Like REFERENCE_RE, this
+# will match a "@@" without a valid name, leaving the name empty.
+#
+# Groups are: braced reference name, unbraced reference name.
+PARSE_REFERENCE_RE = re.compile(
+    r'@@(?:\{(\$\$[A-Za-z0-9:_.]+|[A-Za-z0-9:_]*)\}|'
+    r'((?:\$\$)?[A-Za-z0-9:_]*))')
+
 # Template variables
 VARIABLE_RE = re.compile(
     r'\$\$((?P<var_name>[A-Za-z0-9_]+)|{(?P<var_path>[A-Za-z0-9_.]+)})')
 
+# Template variables, for use when parsing strings.
+#
+# Groups are: variable name, variable path.
+PARSE_VARIABLE_RE = re.compile(
+    r'\$\$(?:([A-Za-z0-9_]+)|{([A-Za-z0-9_.]+)})')
+
+# Names of functions that continue an If block.
+ELSE_FUNC_NAMES = frozenset(('Else', 'ElseIf'))
 
-class StringParserStack(list):
+# Cache of function names to CloudFormation function names.
+_cf_func_names = {}
+
+
+class StringParserStack(object):
     """Manages the stack of functions and other items when parsing strings.
 
-    This is a convenience around a list that associates the stack with
-    any added items, provides access to the StringParser, and provides
-    friendlier access to the most recent stack item.
+    This associates the stack with any added items, provides access to the
+    StringParser, and keeps the most recent stack item available as
+    ``top``.
+
+    The ``add_content`` method of the most recent stack item is also
+    available as ``add_content``, saving a lookup for each piece of content
+    added while parsing.
     """
 
-    def __init__(self, parser):
-        super(StringParserStack, self).__init__()
+    __slots__ = ('parser', 'top', 'add_content', '_items')
 
+    def __init__(self, parser):
         self.parser = parser
+        self.top = None
+        self.add_content = None
+        self._items = []
 
-    @property
-    def current(self):
-        """Return the current stack item."""
-        return self[-1]
+    def __len__(self):
+        return len(self._items)
 
     def push(self, item):
         """Push a new item onto the stack.
@@ -54,7 +86,27 @@ class StringParserStack(list):
         The item will have its ``stack`` attribute set to this stack.
         """
         item.stack = self
-        self.append(item)
+        self._items.append(item)
+        self.top = item
+        self.add_content = item.add_content
+
+    def pop(self, count=1):
+        """Pop one or more of the most recent items off the stack.
+
+        The item below them, if any, will become the new ``top``.
+        """
+        assert count > 0
+
+        items = self._items
+        del items[-count:]
+
+        if items:
+            top = items[-1]
+            self.top = top
+            self.add_content = top.add_content
+        else:
+            self.top = None
+            self.add_content = None
 
 
 class StringParserStackItem(object):
@@ -67,6 +119,8 @@ class StringParserStackItem(object):
     Subclasses can provide additional functionality and serialization.
     """
 
+    __slots__ = ('stack', 'contents', 'pop_count')
+
     def __init__(self, stack=None, contents=None, pop_count=1):
         self.stack = stack
         self.contents = contents or []
@@ -77,15 +131,32 @@ class StringParserStackItem(object):
 
         This will return True if the added content can be pushed as a new
         item onto the stack.
+
+        A string following another string on the same line will be merged
+        into it. Strings on separate lines are kept separate, so that
+        multi-line strings remain readable in the resulting Fn::Join.
         """
-        self.contents.append(content)
+        contents = self.contents
+
+        if (isinstance(content, str) and
+            contents and
+            isinstance(contents[-1], str) and
+            not contents[-1].endswith('\n')):
+            contents[-1] += content
+
+            return False
+
+        contents.append(content)
 
         return isinstance(content, Function)
 
     def serialize(self):
         """Serialize the stack item and its contents to a data structure."""
+        # Strings are left as-is, avoiding a call for the most common type
+        # of content.
         return [
-            self.normalize_content(content)
+            content if isinstance(content, str)
+            else self.normalize_content(content)
             for content in self.contents
         ]
 
@@ -97,12 +168,17 @@ class StringParserStackItem(object):
         If it's a list, it will be normalized, collapsed, and set up with
         a Fn::Join if appropriate.
         """
+        if isinstance(content, str):
+            # Plain strings are the most common content, and never need
+            # to be normalized.
+            return content
+
         if isinstance(content, StringParserStackItem):
             content = content.serialize()
 
         if isinstance(content, list):
             content = [
-                self.normalize_content(c)
+                c if isinstance(c, str) else self.normalize_content(c)
                 for c in content
             ]
 
@@ -119,14 +195,25 @@ class StringParserStackItem(object):
 
         return content
 
-    def __repr__(self):
+    def debug_repr(self):
+        """Return a representation of the item including its serialized form.
+
+        This serializes the item and all of its contents, so it should only
+        be used when explicitly debugging.
+        """
         return '<%r: %r>' % (self.__class__.__name__, self.serialize())
 
+    def __repr__(self):
+        return '<%s: contents=%d>' % (self.__class__.__name__,
+                                      len(self.contents))
+
 
 class Function(StringParserStackItem):
     """A CloudFormation function call appearing in a string."""
 
-    PARAMS_RE = re.compile(',\s*')
+    __slots__ = ('func_name', 'params')
+
+    PARAMS_RE = re.compile(r',\s*')
 
     @classmethod
     def parse_params(cls, params_str, process_string_func):
@@ -140,9 +227,16 @@ class Function(StringParserStackItem):
         if not params_str:
             return []
 
+        if ', ' in params_str or ',\t' in params_str:
+            values = cls.PARAMS_RE.split(params_str)
+        else:
+            # There's no whitespace to strip after the commas, so we can
+            # skip the regex.
+            values = params_str.split(',')
+
         return [
             process_string_func(strip_quotes(value))
-            for value in cls.PARAMS_RE.split(params_str)
+            for value in values
         ]
 
     def __init__(self, func_name, params=None, **kwargs):
@@ -165,10 +259,10 @@ class Function(StringParserStackItem):
         By default, this prefixes the function name with "Fn::", as
         needed by CloudFormation.
         """
-        return 'Fn::%s' % self.func_name
+        return get_cf_func_name(self.func_name)
 
     def serialize(self):
-        norm_func_name = 'Fn::%s' % self.func_name
+        norm_func_name = get_cf_func_name(self.func_name)
 
         return {
             norm_func_name: self.params,
@@ -178,6 +272,8 @@ class Function(StringParserStackItem):
 class BlockFunction(Function):
     """A CloudFormation block-level function call appearing in a string."""
 
+    __slots__ = ()
+
     def normalize_function_contents(self, contents):
         """Normalize the block contents of the function.
 
@@ -185,7 +281,8 @@ class BlockFunction(Function):
         content.
         """
         return [
-            self.normalize_content(content)
+            content if isinstance(content, str)
+            else self.normalize_content(content)
             for content in contents
         ]
 
@@ -206,6 +303,9 @@ class IfBlockFunction(BlockFunction):
     statements.
     """
 
+    __slots__ = ('_is_elseif', '_if_true_content', '_if_false_content',
+                 '_cur_content')
+
     EXPR_RE = re.compile('(%s)' % '|'.join([
         r'\(',
         r'\)',
@@ -274,7 +374,7 @@ class IfBlockFunction(BlockFunction):
         If this is actually an ElseIf, then this will ensure it's placed
         in an If statement.
         """
-        if self._is_elseif and not isinstance(stack.current, IfBlockFunction):
+        if self._is_elseif and not isinstance(stack.top, IfBlockFunction):
             raise ConstructorError(
                 'Found ElseIf without a matching If or ElseIf')
 
@@ -288,28 +388,28 @@ class IfBlockFunction(BlockFunction):
         Adding an ElseIf will trigger a new If block inside the if-false
         section.
         """
-        if isinstance(content, BlockFunction):
-            if content.func_name in ('Else', 'ElseIf'):
-                if not self._if_true_content:
-                    raise ConstructorError(
-                        'Found %s without a "true" value in the If'
-                        % content.func_name)
-                elif self._if_false_content:
-                    raise ConstructorError(
-                        'Found %s after an Else'
-                        % content.func_name)
-
-                self._cur_content = self._if_false_content
-
-                if content.func_name == 'Else':
-                    return False
-                elif content.func_name == 'ElseIf':
-                    # Simulate being an If statement, since that's what
-                    # it turns into. Set it up to handle the proper depth
-                    # in the stack.
-                    content.func_name = 'If'
-                    content.pop_count = self.pop_count + 1
-                    content._is_elseif = True
+        if (isinstance(content, BlockFunction) and
+            content.func_name in ELSE_FUNC_NAMES):
+            if not self._if_true_content:
+                raise ConstructorError(
+                    'Found %s without a "true" value in the If'
+                    % content.func_name)
+            elif self._if_false_content:
+                raise ConstructorError(
+                    'Found %s after an Else'
+                    % content.func_name)
+
+            self._cur_content = self._if_false_content
+
+            if content.func_name == 'Else':
+                return False
+
+            # This is an ElseIf. Simulate being an If statement, since
+            # that's what it turns into. Set it up to handle the proper
+            # depth in the stack.
+            content.func_name = 'If'
+            content.pop_count = self.pop_count + 1
+            content._is_elseif = True
 
         self._cur_content.append(content)
 
@@ -346,7 +446,8 @@ class IfBlockFunction(BlockFunction):
 
         if isinstance(self.params[0], dict):
             param = IfCondition(self.params[0])
-        elif isinstance(self.params[0], basestring):
+            self.stack.parser.template_state.needs_processing = True
+        elif isinstance(self.params[0], str):
             param = self.params[0]
         else:
             raise ConstructorError('Invalid parameter to If: %r'
@@ -360,18 +461,22 @@ class IfBlockFunction(BlockFunction):
 class ElseBlockFunction(BlockFunction):
     """An Else block, as part of an If statement."""
 
+    __slots__ = ()
+
     def validate(self, stack):
         """Validate the Else block's position in hte stack.
 
         This will ensure that the Else block is within an If block.
         """
-        if not isinstance(stack.current, IfBlockFunction):
+        if not isinstance(stack.top, IfBlockFunction):
             raise ConstructorError('Found Else without a matching If')
 
 
 class Base64Function(Function):
     """A wrapper around Fn::Base64."""
 
+    __slots__ = ()
+
     @classmethod
     def parse_params(cls, params_str, process_string_func):
         """Parse the parameters to the Base64 function.
@@ -393,6 +498,8 @@ class Base64Function(Function):
 class GetAZsFunction(Function):
     """A wrapper around Fn::GetAZs, for getting availability zones."""
 
+    __slots__ = ()
+
     @classmethod
     def parse_params(cls, params_str, process_string_func):
         """Parse the parameters to the GetAZs function.
@@ -414,6 +521,8 @@ class GetAZsFunction(Function):
 class SelectFunction(Function):
     """A wrapper around Fn::Select, for indexing into a list."""
 
+    __slots__ = ()
+
     SELECT_PARAMS_RE = re.compile('(%s)' % '|'.join([
         r'^(?P<index>\d+),\s*(\[(?P<array>.+)\]',
         REFERENCE_RE.pattern,
@@ -488,6 +597,8 @@ class SelectFunction(Function):
 class ImportValueFunction(Function):
     """A wrapper around Fn::ImportValue."""
 
+    __slots__ = ()
+
     def serialize(self):
         """Serialize the ImportValue call to a function.
 
@@ -503,13 +614,6 @@ class ImportValueFunction(Function):
 class StringParser(object):
     """Parses a string for functions, variables, and references."""
 
-    PARSE_STR_RE = re.compile('(%s)' % '|'.join([
-        FUNC_RE.pattern,
-        CLOSE_FUNC_RE.pattern,
-        REFERENCE_RE.pattern,
-        VARIABLE_RE.pattern,
-    ]))
-
     FUNCTIONS = {
         'Base64': Base64Function,
         'If': IfBlockFunction,
@@ -541,28 +645,31 @@ class StringParser(object):
         if not s:
             return ''
 
-        lines = s.splitlines(True)
+        i = s.find('\n')
 
-        if lines[0].strip() == '__base64__':
+        if i == -1:
+            first_line = s
+            i = len(s)
+        else:
+            first_line = s[:i]
+
+        if first_line.strip() == '__base64__':
             process_func = 'Fn::Base64'
-            lines = lines[1:]
+            s = s[i + 1:]
         else:
             process_func = None
 
+        # Parse the entire string in one pass, building a single stack of
+        # all strings and functions.
         func_stack = StringParserStack(self)
-
-        # Parse the line, factoring in the previous lines' stack-altering
-        # function calls, to build a single stack of all strings and
-        # functions.
-        for line in lines:
-            self._parse_line(line, func_stack)
+        self._parse_text(s, func_stack)
 
         # Make sure we have a completed stack without any missing
         # end blocks.
         if len(func_stack) > 1:
             raise ConstructorError('Unbalanced braces in template')
 
-        cur_stack = func_stack.current
+        cur_stack = func_stack.top
         result = cur_stack.normalize_content(cur_stack)
 
         if process_func:
@@ -572,8 +679,8 @@ class StringParser(object):
 
         return result
 
-    def _parse_line(self, s, func_stack=None):
-        """Parse a line for any references, functions, or variables.
+    def _parse_text(self, s, func_stack=None):
+        """Parse text for any references, functions, or variables.
 
         Any substrings starting with "@@" will be turned into a
         { "Ref": "<name>" } mapping.
@@ -584,12 +691,20 @@ class StringParser(object):
         Any substrings starting with "$$" will be resolved into a variable's
         content, if the variable exists, or a VarReference if not.
 
+        Plain text will be added to the stack one line at a time.
+
         The provided function stack will be updated based on the results
         of the parse.
         """
-        prev = 0
+        has_tokens = ('<%' in s or '@@' in s or '$$' in s)
 
         if func_stack is None:
+            if not has_tokens and '\n' not in s:
+                # This is a single line of plain text, like most function
+                # parameters. There's nothing to parse, so we can return
+                # it as-is without setting up a stack.
+                return s
+
             stack = StringParserStack(self)
         else:
             stack = func_stack
@@ -597,79 +712,175 @@ class StringParser(object):
         if not stack:
             stack.push(StringParserStackItem())
 
-        for m in self.PARSE_STR_RE.finditer(s):
-            start = m.start()
-            groups = m.groupdict()
-
-            if start > 0:
-                stack.current.add_content(s[prev:start])
-
-            if groups['func_name']:
-                self._handle_func(groups, stack)
-            elif groups['func_close']:
-                self._handle_func_block_close(stack)
-            elif groups['ref_name']:
-                self._handle_ref_name(groups, stack)
-            elif groups['var_name']:
-                self._handle_var(stack, groups['var_name'])
-            elif groups['var_path']:
-                self._handle_var(stack, groups['var_path'])
-
-            prev = m.end()
-
-        if prev != len(s):
-            stack.current.add_content(s[prev:])
+        if has_tokens:
+            self._parse_tokens(s, stack)
+        elif s:
+            # There are no tokens in the text, which is the most common
+            # case. The text can be added without scanning it.
+            self._add_text(stack, s)
 
         if func_stack is not None:
             return None
         else:
-            parts = stack.current.contents
+            parts = stack.top.contents
 
             if len(parts) > 1:
                 return self.template_state.collapse_variables(parts)
             else:
                 return parts[0]
 
-    def _handle_func(self, groups, stack):
+    def _parse_tokens(self, s, stack):
+        """Parse all tokens in text, adding them to the stack.
+
+        Any text between the tokens will be added to the stack as well.
+        """
+        # Rather than running one large regex across the string, we look
+        # for the start of each type of token ("<%", "@@", and "$$") and
+        # then match only that token's pattern at that position. The
+        # positions are cached until the scan moves past them.
+        #
+        # Tokens can't span lines, so each match is bounded to the rest of
+        # the current line (along with its newline, which functions may
+        # consume). This keeps the cost of each match independent of the
+        # length of the string.
+        length = len(s)
+        func_pos = -1
+        ref_pos = -1
+        var_pos = -1
+        prev = 0
+        pos = 0
+
+        while True:
+            if func_pos < pos:
+                func_pos = s.find('<%', pos)
+
+                if func_pos == -1:
+                    func_pos = length
+
+            if ref_pos < pos:
+                ref_pos = s.find('@@', pos)
+
+                if ref_pos == -1:
+                    ref_pos = length
+
+            if var_pos < pos:
+                var_pos = s.find('$$', pos)
+
+                if var_pos == -1:
+                    var_pos = length
+
+            start = min(func_pos, ref_pos, var_pos)
+
+            if start == length:
+                break
+
+            end = s.find('\n', start)
+
+            if end == -1:
+                end = length
+            else:
+                end += 1
+
+            if start == func_pos:
+                m = FUNC_RE.match(s, start, end)
+
+                if m is None:
+                    m = CLOSE_FUNC_RE.match(s, start, end)
+                    handler = self._handle_func_block_close
+                else:
+                    handler = self._handle_func
+            elif start == ref_pos:
+                m = PARSE_REFERENCE_RE.match(s, start, end)
+                handler = self._handle_ref_name
+            else:
+                m = PARSE_VARIABLE_RE.match(s, start, end)
+                handler = self._handle_var
+
+            if m is None:
+                # This wasn't a valid token. Keep scanning from the next
+                # character.
+                pos = start + 1
+                continue
+
+            if start > prev:
+                self._add_text(stack, s[prev:start])
+            elif start > 0 and s[start - 1] != '\n':
+                # Tokens directly following another token on the same line
+                # are separated by an empty string.
+                stack.add_content('')
+
+            handler(stack, m)
+
+            prev = pos = m.end()
+
+        if prev != length:
+            self._add_text(stack, s[prev:])
+
+    def _add_text(self, stack, text):
+        """Adds plain text to the current item on the stack.
+
+        Each line of the text is added separately, so that multi-line
+        strings produce a more readable Fn::Join.
+        """
+        if '\n' in text:
+            add_content = stack.add_content
+
+            for line in text.splitlines(True):
+                add_content(line)
+        else:
+            stack.add_content(text)
+
+    def _handle_func(self, stack, m):
         """Handles functions found in a line.
 
         The list of parameters to the function will be parsed, and a
         Function or similar subclass will be instantiated with the
         information from the function.
         """
-        func_name = groups['func_name']
-        params = groups['params']
+        # Function names repeat throughout a template, so share a single
+        # copy of each rather than keeping one per parsed function.
+        func_name = sys.intern(m.group(1))
 
         cls = self.FUNCTIONS.get(func_name, BlockFunction)
-        norm_params = cls.parse_params(params, self._parse_line)
+        norm_params = cls.parse_params(m.group(2), self._parse_text)
 
         func = cls(func_name, norm_params, stack=stack)
         func.validate(stack)
 
-        can_push = stack.current.add_content(func)
+        can_push = stack.add_content(func)
 
-        if can_push and groups['func_open']:
+        if can_push and m.group(3):
             stack.push(func)
 
-    def _handle_func_block_close(self, stack):
+    def _handle_func_block_close(self, stack, m):
         """Handles the end of block functions found in a line."""
-        for i in range(stack.current.pop_count):
-            stack.pop()
+        pop_count = stack.top.pop_count
+
+        if pop_count >= len(stack):
+            # This would pop the root item off the stack.
+            raise ConstructorError('Unbalanced braces in template')
 
-    def _handle_ref_name(self, groups, stack):
+        stack.pop(pop_count)
+
+    def _handle_ref_name(self, stack, m):
         """Handles resource references found in a line."""
-        ref = groups['ref_name']
+        ref = m.group(1) or m.group(2)
+
+        if not ref:
+            return
 
         if ref.startswith('$$'):
             ref = VarReference(ref[2:])
+            self.template_state.needs_processing = True
 
-        stack.current.add_content({
+        stack.add_content({
             'Ref': ref,
         })
 
-    def _handle_var(self, stack, var_name):
+    def _handle_var(self, stack, m):
         """Handles variable references found in a line."""
-        stack.current.add_content(VarReference(var_name))
+        self.template_state.needs_processing = True
+        stack.add_content(VarReference(m.group(1) or m.group(2)))
 
 
 def strip_quotes(s):
@@ -679,3 +890,19 @@ def strip_quotes(s):
         return s[1:-1]
     else:
         return s
+
+
+def get_cf_func_name(func_name):
+    """Return the CloudFormation name for a function.
+
+    This prefixes the function name with "Fn::". Function names come from
+    a small set, so the results are cached, rather than building a new
+    string for every function being serialized.
+    """
+    try:
+        return _cf_func_names[func_name]
+    except KeyError:
+        cf_func_name = 'Fn::%s' % func_name
+        _cf_func_names[func_name] = cf_func_name
+
+        return cf_func_name
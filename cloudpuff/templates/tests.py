@@ -1,11 +1,14 @@
-from __future__ import unicode_literals
-
 import os
 import shutil
 import tempfile
-from unittest import TestCase
+from unittest import TestCase, skipIf, skipUnless
+from unittest.mock import patch
+
+import yaml
+from yaml.constructor import ConstructorError
 
 from cloudpuff.templates import TemplateCompiler, TemplateReader
+from cloudpuff.templates.errors import TemplateSyntaxError
 from cloudpuff.templates.state import IfCondition, VarReference
 
 
@@ -92,6 +95,71 @@ class TemplateCompilerTests(TestCase):
                 },
             })
 
+    def test_compiling_with_if_expressions_in_aliases(self):
+        """Testing TemplateCompiler with if expressions in YAML aliases"""
+        compiler = TemplateCompiler()
+        compiler.load_string(
+            'Meta:\n'
+            '    Description: My description.\n'
+            '\n'
+            'Resources:\n'
+            '    key1: &shared\n'
+            '        value: |\n'
+            '            <% If (a == b) { %>\n'
+            '            a is b\n'
+            '            <% } %>\n'
+            '    key2: *shared\n'
+            '    key3: |\n'
+            '        <% If (a == c) { %>\n'
+            '        a is c\n'
+            '        <% } %>\n')
+
+        doc = compiler.doc
+        self.assertEqual(list(doc['Conditions'].keys()),
+                         ['IfCondition1', 'IfCondition2', 'IfCondition3'])
+        self.assertEqual(doc['Conditions']['IfCondition2'], {
+            'Fn::Equals': ['a', 'b'],
+        })
+        self.assertEqual(doc['Conditions']['IfCondition3'], {
+            'Fn::Equals': ['a', 'c'],
+        })
+        self.assertEqual(
+            doc['Resources'],
+            {
+                'key1': {
+                    'value': {
+                        'Fn::If': [
+                            'IfCondition1',
+                            'a is b\n',
+                            {
+                                'Ref': 'AWS::NoValue',
+                            }
+                        ],
+                    },
+                },
+                'key2': {
+                    'value': {
+                        'Fn::If': [
+                            'IfCondition2',
+                            'a is b\n',
+                            {
+                                'Ref': 'AWS::NoValue',
+                            }
+                        ],
+                    },
+                },
+                'key3': {
+                    'Fn::If': [
+                        'IfCondition3',
+                        'a is c\n',
+                        {
+                            'Ref': 'AWS::NoValue',
+                        }
+                    ],
+                },
+            })
+        self.assertIsNot(doc['Resources']['key1'], doc['Resources']['key2'])
+
     def test_compiling_with_if_expressions_in_macro(self):
         """Testing TemplateCompiler with if expressions in macro"""
         compiler = TemplateCompiler()
@@ -175,6 +243,165 @@ class TemplateCompilerTests(TestCase):
                 }
             })
 
+    def test_compiling_with_required_params(self):
+        """Testing TemplateCompiler compiles with Required parameters"""
+        compiler = TemplateCompiler()
+        compiler.load_string(
+            'Meta:\n'
+            '    Description: My description.\n'
+            'Parameters:\n'
+            '    key1:\n'
+            '        Type: String\n'
+            '    key2:\n'
+            '        Type: String\n'
+            '        Required: false\n'
+            '    key3:\n'
+            '        Type: String\n'
+            '        Required: "True"\n')
+
+        self.assertEqual(
+            compiler.doc['Parameters'],
+            {
+                'key1': {
+                    'Type': 'String',
+                },
+                'key2': {
+                    'Type': 'String',
+                },
+                'key3': {
+                    'Type': 'String',
+                },
+            })
+        self.assertEqual(
+            compiler.required_params,
+            {
+                'key1': True,
+                'key2': False,
+                'key3': True,
+            })
+
+    def test_compiling_for_amis(self):
+        """Testing TemplateCompiler compiles with for_amis=True"""
+        compiler = TemplateCompiler(for_amis=True)
+        compiler.load_string(
+            'Meta:\n'
+            '    Description: My description.\n'
+            'Resources:\n'
+            '    MyInstance:\n'
+            '        Type: AWS::EC2::Instance\n'
+            '        Metadata:\n'
+            '            CloudPuff:\n'
+            '                AMINameFormat: my-ami-{timestamp}\n'
+            '                PreviousAMI: ami-12345\n'
+            '    MyOtherInstance:\n'
+            '        Type: AWS::EC2::Instance\n'
+            '    MyBucket:\n'
+            '        Type: AWS::S3::Bucket\n'
+            '        Metadata:\n'
+            '            CloudPuff:\n'
+            '                AMINameFormat: my-ami-{timestamp}\n')
+
+        self.assertEqual(
+            compiler.doc['Outputs'],
+            {
+                'CloudPuffMyInstanceInstanceID': {
+                    'Description': 'Instance ID for MyInstance',
+                    'Value': {
+                        'Ref': 'MyInstance',
+                    },
+                },
+                'CloudPuffMyInstanceAMINameFormat': {
+                    'Description': 'Name format for the AMI for MyInstance',
+                    'Value': 'my-ami-{timestamp}',
+                },
+                'CloudPuffMyInstancePreviousAMI': {
+                    'Description': 'Previous AMI ID created for MyInstance',
+                    'Value': 'ami-12345',
+                },
+            })
+        self.assertEqual(
+            compiler.ami_outputs,
+            [
+                {
+                    'resource_name': 'MyInstance',
+                    'outputs': {
+                        'previous_ami_key': 'CloudPuffMyInstancePreviousAMI',
+                        'instance_id_key': 'CloudPuffMyInstanceInstanceID',
+                        'name_format_key': 'CloudPuffMyInstanceAMINameFormat',
+                    },
+                },
+            ])
+
+    def test_compiling_for_amis_with_non_mapping_metadata(self):
+        """Testing TemplateCompiler compiles with for_amis=True and Metadata that isn't a mapping"""
+        compiler = TemplateCompiler(for_amis=True)
+        compiler.load_string(
+            'Meta:\n'
+            '    Description: My description.\n'
+            'Resources:\n'
+            '    MyInstance1:\n'
+            '        Type: AWS::EC2::Instance\n'
+            '        Metadata: CloudPuff\n'
+            '    MyInstance2:\n'
+            '        Type: AWS::EC2::Instance\n'
+            '        Metadata: <% ImportValue(Foo) %>\n'
+            '    MyInstance3:\n'
+            '        Type: AWS::EC2::Instance\n'
+            '        Metadata:\n'
+            '            CloudPuff: AMINameFormat\n')
+
+        self.assertNotIn('Outputs', compiler.doc)
+        self.assertEqual(compiler.ami_outputs, [])
+
+    def test_to_json(self):
+        """Testing TemplateCompiler.to_json"""
+        compiler = TemplateCompiler()
+        compiler.load_string(
+            'Meta:\n'
+            '    Description: My description.\n'
+            'Resources:\n'
+            '    key: value\n')
+
+        self.assertEqual(
+            compiler.to_json(),
+            '{"AWSTemplateFormatVersion":"2010-09-09",'
+            '"Description":"My description.",'
+            '"Resources":{"key":"value"}}')
+
+    def test_to_json_with_non_ascii(self):
+        """Testing TemplateCompiler.to_json with non-ASCII characters"""
+        compiler = TemplateCompiler()
+        compiler.load_string(
+            'Meta:\n'
+            '    Description: Caf\u00e9\n'
+            'Resources:\n'
+            '    key: value\n')
+
+        self.assertEqual(
+            compiler.to_json(),
+            '{"AWSTemplateFormatVersion":"2010-09-09",'
+            '"Description":"Caf\\u00e9",'
+            '"Resources":{"key":"value"}}')
+
+    def test_to_json_with_pretty(self):
+        """Testing TemplateCompiler.to_json with pretty=True"""
+        compiler = TemplateCompiler()
+        compiler.load_string(
+            'Meta:\n'
+            '    Description: My description.\n'
+            'Resources:\n'
+            '    key: value\n')
+
+        self.assertEqual(
+            compiler.to_json(pretty=True),
+            '{\n'
+            '    "AWSTemplateFormatVersion": "2010-09-09",\n'
+            '    "Description": "My description.",\n'
+            '    "Resources": {\n'
+            '        "key": "value"\n'
+            '    }\n'
+            '}')
+
     def test_get_tags(self):
         """Testing TemplateCompiler.get_tags"""
         compiler = TemplateCompiler()
@@ -197,6 +424,22 @@ class TemplateCompilerTests(TestCase):
                 'MyRef': 'MyParamValue',
             })
 
+    def test_get_tags_with_params_dict(self):
+        """Testing TemplateCompiler.get_tags with a dictionary of parameters"""
+        compiler = TemplateCompiler()
+        compiler.load_string(
+            'Meta:\n'
+            '    Name: my-stack\n'
+            '    Tags:\n'
+            '        MyRef: "@@MyParam"\n')
+
+        self.assertEqual(
+            compiler.get_tags({'MyParam': 'MyParamValue'}),
+            {
+                'GenericStackName': 'my-stack',
+                'MyRef': 'MyParamValue',
+            })
+
 
 class TemplateReaderTests(TestCase):
     """Unit tests for TemplateReader."""
@@ -734,6 +977,13 @@ class TemplateReaderTests(TestCase):
                 ]
             })
 
+    def test_embed_funcs_with_unbalanced_close(self):
+        """Testing TemplateReader with embedding a stray <% } %>"""
+        reader = TemplateReader()
+
+        with self.assertRaises(ConstructorError):
+            reader.load_string('key: "foo <% } %> bar"')
+
     def test_embed_funcs_with_get_att(self):
         """Testing TemplateReader with embedding GetAtt"""
         reader = TemplateReader()
@@ -892,6 +1142,17 @@ class TemplateReaderTests(TestCase):
                 },
             })
 
+    def test_embed_funcs_with_empty_param(self):
+        """Testing TemplateReader with embedding functions with an empty parameter"""
+        reader = TemplateReader()
+        reader.load_string('key: <% Foo(a,,b) %>')
+
+        self.assertEqual(
+            reader.doc['key'],
+            {
+                'Fn::Foo': ['a', '', 'b'],
+            })
+
     def test_embed_vars_in_keys(self):
         """Testing TemplateReader with embedding $$variables in keys"""
         reader = TemplateReader()
@@ -919,6 +1180,13 @@ class TemplateReaderTests(TestCase):
                 ]
             })
 
+    def test_process_strings_bare_ref(self):
+        """Testing TemplateReader with processing strings with a bare @@"""
+        reader = TemplateReader()
+        reader.load_string('key: "foo @@ bar"')
+
+        self.assertEqual(reader.doc['key'], 'foo  bar')
+
     def test_process_strings_vars(self):
         """Testing TemplateReader with processing strings with $$variables"""
         reader = TemplateReader()
@@ -927,6 +1195,60 @@ class TemplateReaderTests(TestCase):
 
         self.assertEqual(reader.doc['key'], 'foo - abc - baz')
 
+    def test_process_strings_without_templating(self):
+        """Testing TemplateReader with processing strings without If conditions or $$variables"""
+        reader = TemplateReader()
+        reader.load_string('key: "foo - @@Bar - baz"')
+
+        self.assertFalse(reader.template_state.needs_processing)
+
+    def test_process_strings_with_templating(self):
+        """Testing TemplateReader with processing strings with $$variables"""
+        reader = TemplateReader()
+        reader.load_string('key: "foo - $$myvar - baz"')
+
+        self.assertTrue(reader.template_state.needs_processing)
+
+    def test_process_strings_vars_in_aliases(self):
+        """Testing TemplateReader with processing $$variables in YAML aliases"""
+        reader = TemplateReader()
+        reader.template_state.variables['myvar'] = 'abc'
+        reader.load_string('key1: &tags\n'
+                           '    Name: "foo - $$myvar"\n'
+                           'key2: *tags\n')
+
+        self.assertEqual(reader.doc['key1'], {'Name': 'foo - abc'})
+        self.assertEqual(reader.doc['key2'], {'Name': 'foo - abc'})
+
+    def test_process_macro_with_aliases(self):
+        """Testing TemplateReader with processing macros containing YAML aliases"""
+        reader = TemplateReader()
+        reader.load_string(
+            '--- !macros\n'
+            'macro1:\n'
+            '    content:\n'
+            '        key1: &tags\n'
+            '            Name: "foo - $$myvar"\n'
+            '        key2: *tags\n'
+            '---\n'
+            'key: !call-macro\n'
+            '    macro: macro1\n'
+            '    myvar: abc\n')
+
+        self.assertEqual(
+            reader.doc['key'],
+            {
+                'key1': {
+                    'Name': 'foo - abc',
+                },
+                'key2': {
+                    'Name': 'foo - abc',
+                },
+            })
+
+        # The aliased subtree is only processed once.
+        self.assertIs(reader.doc['key']['key1'], reader.doc['key']['key2'])
+
     def test_process_strings_unresolved_vars(self):
         """Testing TemplateReader with processing strings with unresolved $$variables"""
         reader = TemplateReader()
@@ -1089,6 +1411,39 @@ class TemplateReaderTests(TestCase):
         self.assertEqual(variables['var2'], 'value1-foo')
         self.assertEqual(variables['var3'], 'value1-foobar')
 
+    def test_doc_vars_with_circular_refs(self):
+        """Testing TemplateReader with '--- !vars' document with circular variable references"""
+        reader = TemplateReader()
+
+        with self.assertRaises(ConstructorError):
+            reader.load_string(
+                '--- !vars\n'
+                'var1: $${var2}-foo\n'
+                'var2: $${var1}-bar\n')
+
+    def test_doc_vars_with_self_ref(self):
+        """Testing TemplateReader with '--- !vars' document with a variable referencing itself"""
+        reader = TemplateReader()
+
+        with self.assertRaisesRegex(ConstructorError,
+                                    'Variable "var1" references itself'):
+            reader.load_string(
+                '--- !vars\n'
+                'var1: $$var1\n')
+
+    def test_doc_vars_with_unused_self_ref(self):
+        """Testing TemplateReader with '--- !vars' document with an unused variable referencing itself"""
+        reader = TemplateReader()
+
+        with self.assertRaisesRegex(ConstructorError,
+                                    'Variable "var1" references itself'):
+            reader.load_string(
+                '--- !vars\n'
+                'var1: foo-$$var1\n'
+                'var2: bar\n'
+                '---\n'
+                'key: $$var2\n')
+
     def test_statement_tags(self):
         """Testing TemplateReader with !tags"""
         reader = TemplateReader()
@@ -1313,7 +1668,7 @@ class TemplateReaderTests(TestCase):
         defs_dir = os.path.join(tempdir, 'defs')
         filename = os.path.join(defs_dir, '__main__.yaml')
 
-        os.mkdir(defs_dir, 0700)
+        os.mkdir(defs_dir, 0o700)
 
         with open(filename, 'w') as fp:
             fp.write('--- !vars\n'
@@ -1361,8 +1716,8 @@ class TemplateReaderTests(TestCase):
         defs_dir = os.path.join(tempdir, 'defs')
         test_dir = os.path.join(defs_dir, 'test')
 
-        os.mkdir(defs_dir, 0700)
-        os.mkdir(test_dir, 0700)
+        os.mkdir(defs_dir, 0o700)
+        os.mkdir(test_dir, 0o700)
 
         filename = os.path.join(defs_dir, '__main__.yaml')
 
@@ -1411,3 +1766,135 @@ class TemplateReaderTests(TestCase):
                 })
         finally:
             shutil.rmtree(tempdir)
+
+    def test_statement_import_after_nested_file_changed(self):
+        """Testing TemplateReader with !import after nested file changes"""
+        tempdir = tempfile.mkdtemp(prefix='cloudpuff-tests')
+        defs_dir = os.path.join(tempdir, 'defs')
+        test_dir = os.path.join(defs_dir, 'test')
+
+        os.mkdir(defs_dir, 0o700)
+        os.mkdir(test_dir, 0o700)
+
+        with open(os.path.join(defs_dir, '__main__.yaml'), 'w') as fp:
+            fp.write('__import__:\n'
+                     '    !import test\n')
+
+        filename = os.path.join(test_dir, '__main__.yaml')
+
+        with open(filename, 'w') as fp:
+            fp.write('--- !vars\n'
+                     'var1: value1\n')
+
+        try:
+            reader = TemplateReader()
+            reader.load_string('__imports__:\n'
+                               '    !import %s\n'
+                               % defs_dir)
+
+            self.assertEqual(
+                reader.template_state.variables,
+                {
+                    'var1': 'value1'
+                })
+
+            with open(filename, 'w') as fp:
+                fp.write('--- !vars\n'
+                         'var1: new-value1\n')
+
+            reader = TemplateReader()
+            reader.load_string('__imports__:\n'
+                               '    !import %s\n'
+                               % defs_dir)
+
+            self.assertEqual(
+                reader.template_state.variables,
+                {
+                    'var1': 'new-value1'
+                })
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_statement_import_cached(self):
+        """Testing TemplateReader with !import of a cached file"""
+        tempdir = tempfile.mkdtemp(prefix='cloudpuff-tests')
+        filename = os.path.join(tempdir, 'defs.yaml')
+
+        with open(filename, 'w') as fp:
+            fp.write('--- !vars\n'
+                     'var1:\n'
+                     '    key: value1\n')
+
+        try:
+            reader = TemplateReader()
+            reader.load_string('__imports__:\n'
+                               '    !import %s\n'
+                               % filename)
+
+            # The file is unchanged, so later imports must not load it
+            # again, and changes made by one importer must not be seen by
+            # the next.
+            with patch.object(TemplateReader, 'load_file') as load_file:
+                for i in range(2):
+                    reader.template_state.variables['var1']['key'] = 'changed'
+
+                    reader = TemplateReader()
+                    reader.load_string('__imports__:\n'
+                                       '    !import %s\n'
+                                       % filename)
+
+                    self.assertEqual(
+                        reader.template_state.variables,
+                        {
+                            'var1': {
+                                'key': 'value1',
+                            },
+                        })
+
+            self.assertFalse(load_file.called)
+        finally:
+            shutil.rmtree(tempdir)
+
+    @skipUnless(hasattr(yaml, 'CSafeLoader'), 'libyaml is not available')
+    def test_load_string_with_tab_in_block_scalar_libyaml(self):
+        """Testing TemplateReader.load_string with a tab starting a block scalar with libyaml"""
+        reader = TemplateReader()
+
+        with self.assertRaises(TemplateSyntaxError) as cm:
+            reader.load_string('key: |\n'
+                               '    \tvalue\n')
+
+        self.assertEqual(cm.exception.line, 2)
+
+    @skipIf(hasattr(yaml, 'CSafeLoader'), 'libyaml is available')
+    def test_load_string_with_tab_in_block_scalar_pure(self):
+        """Testing TemplateReader.load_string with a tab starting a block scalar without libyaml"""
+        reader = TemplateReader()
+        reader.load_string('key: |\n'
+                           '    \tvalue\n')
+
+        self.assertEqual(reader.doc['key'], '\tvalue\n')
+
+    def test_load_file_with_syntax_error(self):
+        """Testing TemplateReader.load_file with a syntax error"""
+        tempdir = tempfile.mkdtemp(prefix='cloudpuff-tests')
+        filename = os.path.join(tempdir, 'test.yaml')
+
+        with open(filename, 'w') as fp:
+            fp.write('key1: value1\n'
+                     'key2: [value2\n'
+                     'key3: value3\n')
+
+        try:
+            reader = TemplateReader()
+
+            with self.assertRaises(TemplateSyntaxError) as cm:
+                reader.load_file(filename)
+
+            e = cm.exception
+            self.assertEqual(e.line, 3)
+            self.assertEqual(e.code,
+                             '    key3: value3\n'
+                             '        ^')
+        finally:
+            shutil.rmtree(tempdir)
@@ -1,14 +1,43 @@
-from __future__ import print_function, unicode_literals
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
 
-from six.moves import input
 
+#: The file storing values previously entered for template parameters.
+PARAM_CACHE_FILENAME = os.path.join(os.path.expanduser('~'), '.cache',
+                                    'cloudpuff', 'params.json')
 
-def prompt_template_param(template_param, required=True):
+#: The maximum number of parameter values to remember.
+MAX_PARAM_CACHE_ENTRIES = 512
+
+#: The minimum time in seconds spent at a prompt for a new value to be
+#: remembered.
+PARAM_CACHE_MIN_PROMPT_TIME = 0.5
+
+
+# Values previously entered for template parameters.
+#
+# This maps cache keys (see _get_param_cache_key) to values, ordered from
+# least to most recently used. It's loaded from PARAM_CACHE_FILENAME the
+# first time a remembered value is needed.
+_param_cache = None
+
+
+def prompt_template_param(template_param, required=True,
+                          remember_scope=None):
     """Prompt the user for a template parameter.
 
     The template parameter name, description, and any default will be
     shown to the user.
 
+    If a ``remember_scope`` is provided, values the user took a moment to
+    enter are remembered across runs. The next time the user is prompted
+    for the same parameter in that scope, pressing Enter will reuse the
+    remembered value. Remembered values are never displayed.
+
     The resulting value will be returned.
 
     Args:
@@ -18,6 +47,11 @@ def prompt_template_param(template_param, required=True):
         required (bool, optional):
             Whether this parameter is required.
 
+        remember_scope (unicode, optional):
+            The scope (such as a template filename) that values are
+            remembered in. If not provided, values aren't remembered. This
+            must not be provided for ``NoEcho`` parameters.
+
     Returns:
         unicode:
         The value chosen for the parameter, or the default value if not
@@ -25,28 +59,403 @@ def prompt_template_param(template_param, required=True):
     """
     key = template_param.parameter_key
     default_value = template_param.default_value
+    remembered_value = _get_remembered_value(template_param, remember_scope)
 
-    print()
-    print(template_param.description)
-
-    if default_value:
+    if remembered_value:
+        prompt = '%s [previous value]: ' % key
+    elif default_value:
         prompt = '%s [%s]: ' % (key, default_value)
     else:
         prompt = '%s: ' % key
 
-    prompt = prompt.encode('utf-8')
+    # The description and the first prompt are written together, so that
+    # the output only needs to be flushed once.
+    output = '\n%s\n%s' % (template_param.description, prompt)
+
+    start_time = time.monotonic()
 
     while True:
+        sys.stdout.write(output)
+        sys.stdout.flush()
+
         # We should be checking template_param.no_echo, and using getpass()
         # if it's set, but boto has a bug causing no_echo to always be True.
         # This can be fixed once https://github.com/boto/boto/pull/3052 has
         # landed.
-        value = input(prompt)
+        #
+        # This reads from stdin directly rather than using input(), which
+        # would load and initialize readline, and line editing isn't needed
+        # here.
+        line = sys.stdin.readline()
+
+        if not line:
+            raise EOFError
+
+        value = line.rstrip('\r\n')
+        output = prompt
 
-        if not value and default_value:
-            value = default_value
+        if not value:
+            value = remembered_value or default_value or ''
 
         if value or not required:
             break
 
+    _remember_param_value(template_param, remember_scope, value,
+                          time.monotonic() - start_time)
+
     return value
+
+
+def prompt_template_params(template_params, required_params=None,
+                           remember_scope=None, no_echo_params=None,
+                           use_editor=False):
+    """Prompt the user for several template parameters at once.
+
+    If ``use_editor`` is set, an editor is configured (through
+    :envvar:`VISUAL` or :envvar:`EDITOR`), and the console is interactive,
+    a file listing each parameter, its description, and its default will
+    be opened in the editor, letting the user fill in all the values at
+    once. Otherwise, or if the file couldn't be edited or read, the user
+    will be prompted for each parameter in turn.
+
+    Any required parameters left empty in the editor will be prompted for
+    afterward.
+
+    Args:
+        template_params (list of
+                         boto.cloudformation.template.TemplateParameter):
+            The template parameters to prompt for.
+
+        required_params (dict, optional):
+            A dictionary mapping parameter keys to booleans indicating if
+            they're required. Parameters not listed are required.
+
+        remember_scope (unicode, optional):
+            The scope (such as a template filename) that values are
+            remembered in. If not provided, values aren't remembered.
+
+        no_echo_params (set, optional):
+            The keys of ``NoEcho`` parameters. Values for these are never
+            remembered.
+
+        use_editor (bool, optional):
+            Whether to let the user fill in the parameters using an editor.
+
+    Returns:
+        collections.OrderedDict:
+        A dictionary mapping each parameter's key to the chosen value.
+    """
+    if required_params is None:
+        required_params = {}
+
+    if no_echo_params is None:
+        no_echo_params = set()
+
+    param_scopes = dict(
+        (template_param.parameter_key,
+         None if template_param.parameter_key in no_echo_params
+         else remember_scope)
+        for template_param in template_params
+    )
+    values = None
+
+    if use_editor and template_params and sys.stdin.isatty():
+        editor = os.environ.get('VISUAL') or os.environ.get('EDITOR')
+
+        if editor:
+            remembered_values = dict(
+                (template_param.parameter_key,
+                 _get_remembered_value(
+                     template_param,
+                     param_scopes[template_param.parameter_key]))
+                for template_param in template_params
+            )
+
+            start_time = time.monotonic()
+            values = _edit_template_params(editor, template_params,
+                                           remembered_values)
+            elapsed = time.monotonic() - start_time
+        else:
+            logging.warning('Set $VISUAL or $EDITOR to edit parameters. '
+                            'Prompting for each parameter instead.')
+
+    result = OrderedDict()
+
+    for template_param in template_params:
+        key = template_param.parameter_key
+        required = required_params.get(key, True)
+        param_scope = param_scopes[key]
+
+        if values is None:
+            value = prompt_template_param(template_param, required=required,
+                                          remember_scope=param_scope)
+        else:
+            default_value = template_param.default_value
+            remembered_value = remembered_values[key]
+
+            # This is the value the parameter was given in the file (see
+            # _edit_template_params).
+            if remembered_value:
+                initial_value = ''
+            else:
+                initial_value = default_value or ''
+
+            edited_value = values.get(key) or ''
+            value = edited_value or remembered_value or default_value or ''
+
+            if required and not value:
+                value = prompt_template_param(template_param,
+                                              required=required,
+                                              remember_scope=param_scope)
+            elif edited_value != initial_value:
+                # Only values the user changed in the editor are
+                # remembered. Those left as they were weren't chosen in
+                # the time spent editing.
+                _remember_param_value(template_param, param_scope, value,
+                                      elapsed)
+
+        result[key] = value
+
+    return result
+
+
+def _edit_template_params(editor, template_params, remembered_values):
+    """Let the user fill in template parameters using an editor.
+
+    Parameters with a remembered value are left empty in the file, so that
+    the value isn't displayed. Leaving them empty reuses the value. Other
+    parameters are filled in with the template's default.
+
+    Args:
+        editor (unicode):
+            The editor command to run.
+
+        template_params (list of
+                         boto.cloudformation.template.TemplateParameter):
+            The template parameters to fill in.
+
+        remembered_values (dict):
+            A dictionary mapping parameter keys to their remembered values,
+            or ``None``.
+
+    Returns:
+        dict:
+        A dictionary mapping parameter keys to the values entered, or
+        ``None`` if the values couldn't be edited or read.
+    """
+    # These are only needed when editing, so they're imported here rather
+    # than for every command.
+    import shlex
+    import subprocess
+    import tempfile
+
+    import yaml
+
+    lines = [
+        '# Enter values for the template parameters below. Lines starting',
+        '# with "#" are ignored.',
+    ]
+
+    for template_param in template_params:
+        lines.append('')
+        lines += [
+            '# %s' % line
+            for line in (template_param.description or '').splitlines()
+        ]
+
+        key = template_param.parameter_key
+
+        if remembered_values[key]:
+            lines.append('# Leave empty to use the previous value.')
+            value = ''
+        else:
+            value = template_param.default_value or ''
+
+        # JSON strings are valid YAML, and take care of any quoting needed.
+        lines.append('%s: %s' % (key, json.dumps(value)))
+
+    # The file is only readable by the user, as parameters may contain
+    # sensitive values.
+    fd, filename = tempfile.mkstemp(prefix='cloudpuff-params-',
+                                    suffix='.yaml')
+
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+            fp.write('\n'.join(lines) + '\n')
+
+        if subprocess.call(shlex.split(editor) + [filename]) != 0:
+            logging.warning('The editor exited with an error. Prompting '
+                            'for each parameter instead.')
+            return None
+
+        # The base loader leaves all values as strings, as CloudFormation
+        # expects.
+        with open(filename, 'r', encoding='utf-8') as fp:
+            values = yaml.load(fp, Loader=yaml.BaseLoader)
+    except (IOError, OSError, yaml.YAMLError) as e:
+        logging.warning('Unable to read the parameters from the editor: %s. '
+                        'Prompting for each parameter instead.', e)
+        return None
+    finally:
+        os.unlink(filename)
+
+    if values is None:
+        values = {}
+    elif not isinstance(values, dict):
+        logging.warning('The edited parameters were not in the form of '
+                        '"Key: value". Prompting for each parameter '
+                        'instead.')
+        return None
+
+    return values
+
+
+def _get_remembered_value(template_param, remember_scope):
+    """Return the value remembered for a template parameter.
+
+    Args:
+        template_param (boto.cloudformation.template.TemplateParameter):
+            The template parameter.
+
+        remember_scope (unicode):
+            The scope the value is remembered in, or ``None`` if values
+            aren't being remembered.
+
+    Returns:
+        unicode:
+        The remembered value, or ``None`` if there isn't one.
+    """
+    if remember_scope is None:
+        return None
+
+    cache_key = _get_param_cache_key(remember_scope,
+                                     template_param.parameter_key,
+                                     template_param.default_value)
+
+    return _load_param_cache().get(cache_key)
+
+
+def _remember_param_value(template_param, remember_scope, value, elapsed):
+    """Remember the value chosen for a template parameter.
+
+    Only values differing from the template's default need remembering,
+    and new values only if they took a while to come up with. Quick
+    answers (or values piped in) aren't worth the space.
+
+    Values are kept in least-recently-used order, so that the oldest can
+    be dropped once the cache is full.
+
+    Args:
+        template_param (boto.cloudformation.template.TemplateParameter):
+            The template parameter.
+
+        remember_scope (unicode):
+            The scope to remember the value in, or ``None`` if values
+            aren't being remembered.
+
+        value (unicode):
+            The value chosen for the parameter.
+
+        elapsed (float):
+            The time in seconds the user spent choosing the value.
+    """
+    if remember_scope is None:
+        return
+
+    param_cache = _load_param_cache()
+    cache_key = _get_param_cache_key(remember_scope,
+                                     template_param.parameter_key,
+                                     template_param.default_value)
+    old_value = param_cache.get(cache_key)
+
+    if (value and
+        value != template_param.default_value and
+        (value == old_value or elapsed >= PARAM_CACHE_MIN_PROMPT_TIME)):
+        param_cache[cache_key] = value
+        param_cache.move_to_end(cache_key)
+
+        while len(param_cache) > MAX_PARAM_CACHE_ENTRIES:
+            param_cache.popitem(last=False)
+
+        _save_param_cache()
+    elif old_value is not None:
+        del param_cache[cache_key]
+        _save_param_cache()
+
+
+def _get_param_cache_key(remember_scope, key, default_value):
+    """Return the key used to cache a template parameter's value.
+
+    Args:
+        remember_scope (unicode):
+            The scope the value is remembered in.
+
+        key (unicode):
+            The template parameter's key.
+
+        default_value (unicode):
+            The template's default value for the parameter.
+
+    Returns:
+        unicode:
+        The key for the parameter in the cache.
+    """
+    return '%s:%s=%s' % (remember_scope, key, default_value or '')
+
+
+def _load_param_cache():
+    """Return the cache of previously-entered parameter values.
+
+    The cache will be loaded from disk the first time this is called.
+
+    Returns:
+        collections.OrderedDict:
+        The parameter value cache.
+    """
+    global _param_cache
+
+    if _param_cache is None:
+        try:
+            with open(PARAM_CACHE_FILENAME, 'r') as fp:
+                _param_cache = json.load(fp, object_pairs_hook=OrderedDict)
+        except (IOError, ValueError):
+            _param_cache = None
+
+        if not isinstance(_param_cache, OrderedDict):
+            # The file was missing, corrupt, or held something other than
+            # a JSON object.
+            _param_cache = OrderedDict()
+
+    return _param_cache
+
+
+def _save_param_cache():
+    """Save the cache of previously-entered parameter values to disk.
+
+    The cache is written to a temporary file, which then replaces the old
+    cache file. The temporary file is removed if it can't be written or
+    moved into place. The file is only readable by the user, as parameters
+    may contain sensitive values.
+    """
+    dirname = os.path.dirname(PARAM_CACHE_FILENAME)
+    temp_filename = '%s.%d.tmp' % (PARAM_CACHE_FILENAME, os.getpid())
+
+    try:
+        if not os.path.exists(dirname):
+            os.makedirs(dirname, 0o700)
+
+        fd = os.open(temp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                     0o600)
+
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(_param_cache, fp)
+
+            os.replace(temp_filename, PARAM_CACHE_FILENAME)
+        except Exception:
+            # Don't leave a copy of the values behind.
+            os.unlink(temp_filename)
+            raise
+    except (IOError, OSError) as e:
+        logging.warning('Unable to save parameter values to %s: %s',
+                        PARAM_CACHE_FILENAME, e)
@@ -0,0 +1,487 @@
+import io
+import json
+import os
+import shutil
+import stat
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from cloudpuff.utils import console
+
+
+class FakeTemplateParam(object):
+    """A stand-in for boto's TemplateParameter."""
+
+    def __init__(self, parameter_key, default_value=None, description=''):
+        self.parameter_key = parameter_key
+        self.default_value = default_value
+        self.description = description
+
+
+class FakeTTY(io.StringIO):
+    """A stand-in for an interactive stdin."""
+
+    def isatty(self):
+        return True
+
+
+class ConsoleTests(TestCase):
+    """Unit tests for cloudpuff.utils.console."""
+
+    def setUp(self):
+        super(ConsoleTests, self).setUp()
+
+        self.tempdir = tempfile.mkdtemp(prefix='cloudpuff-tests')
+        self.cache_filename = os.path.join(self.tempdir, 'cache',
+                                           'params.json')
+
+        for patcher in (patch.dict(os.environ, {'HOME': self.tempdir}),
+                        patch.object(console, 'PARAM_CACHE_FILENAME',
+                                     self.cache_filename),
+                        patch.object(console, '_param_cache', None),
+                        patch.object(console, 'PARAM_CACHE_MIN_PROMPT_TIME',
+                                     0),
+                        patch('sys.stdout', io.StringIO())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        os.environ.pop('VISUAL', None)
+        os.environ.pop('EDITOR', None)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+        super(ConsoleTests, self).tearDown()
+
+    def test_prompt_template_param(self):
+        """Testing prompt_template_param"""
+        param = FakeTemplateParam('Key', 'default', 'My description.')
+
+        with patch('sys.stdin', io.StringIO('value\n')):
+            self.assertEqual(console.prompt_template_param(param), 'value')
+
+        self.assertEqual(console.sys.stdout.getvalue(),
+                         '\nMy description.\nKey [default]: ')
+
+    def test_prompt_template_param_with_default(self):
+        """Testing prompt_template_param with an empty value and a default"""
+        param = FakeTemplateParam('Key', 'default')
+
+        with patch('sys.stdin', io.StringIO('\n')):
+            self.assertEqual(console.prompt_template_param(param), 'default')
+
+    def test_prompt_template_param_required(self):
+        """Testing prompt_template_param prompts again for a required value
+        """
+        param = FakeTemplateParam('Key')
+
+        with patch('sys.stdin', io.StringIO('\nvalue\n')):
+            self.assertEqual(console.prompt_template_param(param), 'value')
+
+    def test_prompt_template_param_eof(self):
+        """Testing prompt_template_param with end of input"""
+        param = FakeTemplateParam('Key')
+
+        with patch('sys.stdin', io.StringIO('')):
+            with self.assertRaises(EOFError):
+                console.prompt_template_param(param)
+
+    def test_prompt_template_param_without_scope(self):
+        """Testing prompt_template_param without remember_scope doesn't
+        remember values
+        """
+        self._prompt('Key', 'value')
+
+        self.assertFalse(os.path.exists(self.cache_filename))
+
+    def test_prompt_template_param_remembers_value(self):
+        """Testing prompt_template_param remembers values"""
+        self._prompt('Key', 'value', remember_scope='/template.yaml')
+
+        self._reset_cache()
+        param = FakeTemplateParam('Key', 'default')
+
+        with patch('sys.stdin', io.StringIO('\n')):
+            value = console.prompt_template_param(
+                param,
+                remember_scope='/template.yaml')
+
+        self.assertEqual(value, 'value')
+
+        # The remembered value must never be shown.
+        output = console.sys.stdout.getvalue()
+        self.assertIn('Key [previous value]: ', output)
+        self.assertNotIn('[value]', output)
+
+    def test_prompt_template_param_remembers_by_scope(self):
+        """Testing prompt_template_param remembers values per scope"""
+        self._prompt('Key', 'value', remember_scope='/template1.yaml')
+
+        self._reset_cache()
+
+        self.assertEqual(
+            self._prompt('Key', '', remember_scope='/template2.yaml'),
+            'default')
+
+    def test_prompt_template_param_skips_default(self):
+        """Testing prompt_template_param doesn't remember default values"""
+        self._prompt('Key', 'default', remember_scope='/template.yaml')
+
+        self.assertFalse(os.path.exists(self.cache_filename))
+
+    def test_prompt_template_param_min_prompt_time(self):
+        """Testing prompt_template_param doesn't remember quickly-entered
+        new values
+        """
+        with patch.object(console, 'PARAM_CACHE_MIN_PROMPT_TIME', 60):
+            self._prompt('Key', 'value', remember_scope='/template.yaml')
+
+        self.assertFalse(os.path.exists(self.cache_filename))
+
+    def test_prompt_template_param_min_prompt_time_reused(self):
+        """Testing prompt_template_param keeps quickly-reused values"""
+        self._prompt('Key', 'value', remember_scope='/template.yaml')
+
+        with patch.object(console, 'PARAM_CACHE_MIN_PROMPT_TIME', 60):
+            self._prompt('Key', '', remember_scope='/template.yaml')
+
+        self.assertEqual(self._read_cache(), {
+            '/template.yaml:Key=default': 'value',
+        })
+
+    def test_eviction(self):
+        """Testing remembered values are evicted at
+        MAX_PARAM_CACHE_ENTRIES
+        """
+        with patch.object(console, 'MAX_PARAM_CACHE_ENTRIES', 2):
+            self._prompt('Key1', 'value1', remember_scope='/template.yaml')
+            self._prompt('Key2', 'value2', remember_scope='/template.yaml')
+
+            # Reusing Key1 makes Key2 the least recently used.
+            self._prompt('Key1', '', remember_scope='/template.yaml')
+            self._prompt('Key3', 'value3', remember_scope='/template.yaml')
+
+        self.assertEqual(list(self._read_cache().items()), [
+            ('/template.yaml:Key1=default', 'value1'),
+            ('/template.yaml:Key3=default', 'value3'),
+        ])
+
+    def test_save_atomic(self):
+        """Testing the remembered values are saved atomically"""
+        self._prompt('Key', 'value1', remember_scope='/template.yaml')
+
+        mode = os.stat(self.cache_filename).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o600)
+        self.assertEqual(os.listdir(os.path.dirname(self.cache_filename)),
+                         ['params.json'])
+
+        # A failure to write or replace the file leaves the old one intact,
+        # and cleans up the temporary file.
+        for patcher in (patch('json.dump', side_effect=IOError('Oops')),
+                        patch('os.replace', side_effect=OSError('Oops'))):
+            with patcher, self.assertLogs(level='WARNING'):
+                self._prompt('Key', 'value2', remember_scope='/template.yaml')
+
+            self.assertEqual(
+                os.listdir(os.path.dirname(self.cache_filename)),
+                ['params.json'])
+
+        self.assertEqual(self._read_cache(), {
+            '/template.yaml:Key=default': 'value1',
+        })
+
+    def test_load_corrupt(self):
+        """Testing remembered values with a corrupt cache file"""
+        os.mkdir(os.path.dirname(self.cache_filename), 0o700)
+
+        with open(self.cache_filename, 'w') as fp:
+            fp.write('{"/template.yaml:Key=default": ')
+
+        self.assertEqual(
+            self._prompt('Key', '', remember_scope='/template.yaml'),
+            'default')
+
+        self._prompt('Key', 'value', remember_scope='/template.yaml')
+
+        self.assertEqual(self._read_cache(), {
+            '/template.yaml:Key=default': 'value',
+        })
+
+    def test_load_not_object(self):
+        """Testing remembered values with a cache file not containing an
+        object
+        """
+        os.mkdir(os.path.dirname(self.cache_filename), 0o700)
+
+        for content in ('[]', '"x"', 'null'):
+            with open(self.cache_filename, 'w') as fp:
+                fp.write(content)
+
+            self._reset_cache()
+
+            self.assertEqual(
+                self._prompt('Key', '', remember_scope='/template.yaml'),
+                'default')
+
+        self._prompt('Key', 'value', remember_scope='/template.yaml')
+
+        self.assertEqual(self._read_cache(), {
+            '/template.yaml:Key=default': 'value',
+        })
+
+    def test_prompt_template_params(self):
+        """Testing prompt_template_params"""
+        params = [
+            FakeTemplateParam('Key1', 'default1'),
+            FakeTemplateParam('Key2'),
+        ]
+
+        with patch('sys.stdin', io.StringIO('\nvalue2\n')):
+            values = console.prompt_template_params(params)
+
+        self.assertEqual(list(values.items()), [
+            ('Key1', 'default1'),
+            ('Key2', 'value2'),
+        ])
+
+    def test_prompt_template_params_no_echo(self):
+        """Testing prompt_template_params doesn't remember NoEcho
+        parameters
+        """
+        params = [
+            FakeTemplateParam('Key1', 'default1'),
+            FakeTemplateParam('Password'),
+        ]
+
+        with patch('sys.stdin', io.StringIO('value1\ns3cret\n')):
+            console.prompt_template_params(params,
+                                           remember_scope='/template.yaml',
+                                           no_echo_params={'Password'})
+
+        self.assertEqual(self._read_cache(), {
+            '/template.yaml:Key1=default1': 'value1',
+        })
+
+    def test_prompt_template_params_editor(self):
+        """Testing prompt_template_params with an editor"""
+        params = [
+            FakeTemplateParam('Key1', 'default1', 'Description 1.'),
+            FakeTemplateParam('Key2', description='Description 2.'),
+            FakeTemplateParam('Key3', 'default3'),
+        ]
+
+        def _edit(content):
+            self.assertEqual(
+                content,
+                '# Enter values for the template parameters below. Lines '
+                'starting\n'
+                '# with "#" are ignored.\n'
+                '\n'
+                '# Description 1.\n'
+                'Key1: "default1"\n'
+                '\n'
+                '# Description 2.\n'
+                'Key2: ""\n'
+                '\n'
+                'Key3: "default3"\n')
+
+            return ('# Comment\n'
+                    'Key1: "default1"\n'
+                    'Key2: "value: 2"\n'
+                    'Key3: true\n')
+
+        values = self._edit_params(params, _edit,
+                                   remember_scope='/template.yaml')
+
+        self.assertEqual(list(values.items()), [
+            ('Key1', 'default1'),
+            ('Key2', 'value: 2'),
+            ('Key3', 'true'),
+        ])
+
+        # Only the changed values are remembered.
+        self.assertEqual(self._read_cache(), {
+            '/template.yaml:Key2=': 'value: 2',
+            '/template.yaml:Key3=default3': 'true',
+        })
+
+    def test_prompt_template_params_editor_remembered(self):
+        """Testing prompt_template_params with an editor and remembered
+        values
+        """
+        self._prompt('Key1', 'value1', remember_scope='/template.yaml')
+        self._reset_cache()
+
+        params = [
+            FakeTemplateParam('Key1', 'default'),
+        ]
+
+        def _edit(content):
+            # The remembered value must never be shown.
+            self.assertNotIn('value1', content)
+            self.assertIn('# Leave empty to use the previous value.\n'
+                          'Key1: ""\n',
+                          content)
+
+            return content
+
+        values = self._edit_params(params, _edit,
+                                   remember_scope='/template.yaml')
+
+        self.assertEqual(values, {'Key1': 'value1'})
+
+    def test_prompt_template_params_editor_not_requested(self):
+        """Testing prompt_template_params without use_editor doesn't run
+        the editor
+        """
+        params = [
+            FakeTemplateParam('Key1', 'default1'),
+        ]
+
+        with patch.dict(os.environ, {'EDITOR': 'my-editor'}), \
+             patch('sys.stdin', FakeTTY('value1\n')), \
+             patch('subprocess.call') as call:
+            values = console.prompt_template_params(params)
+
+        self.assertFalse(call.called)
+        self.assertEqual(values, {'Key1': 'value1'})
+
+    def test_prompt_template_params_editor_prompts_required(self):
+        """Testing prompt_template_params with an editor prompts for
+        required parameters left empty
+        """
+        params = [
+            FakeTemplateParam('Key1'),
+            FakeTemplateParam('Key2'),
+        ]
+
+        values = self._edit_params(params, lambda content: content,
+                                   required_params={'Key2': False},
+                                   stdin='value1\n')
+
+        self.assertEqual(values, {
+            'Key1': 'value1',
+            'Key2': '',
+        })
+
+    def test_prompt_template_params_editor_failed(self):
+        """Testing prompt_template_params falls back to prompts when the
+        editor fails
+        """
+        params = [
+            FakeTemplateParam('Key1'),
+        ]
+
+        with self.assertLogs(level='WARNING'):
+            values = self._edit_params(params, lambda content: content,
+                                       editor_result=1,
+                                       stdin='value1\n')
+
+        self.assertEqual(values, {'Key1': 'value1'})
+
+    def test_prompt_template_params_editor_invalid_yaml(self):
+        """Testing prompt_template_params falls back to prompts with
+        invalid YAML from the editor
+        """
+        params = [
+            FakeTemplateParam('Key1'),
+        ]
+
+        with self.assertLogs(level='WARNING'):
+            values = self._edit_params(params, lambda content: 'Key1: "',
+                                       stdin='value1\n')
+
+        self.assertEqual(values, {'Key1': 'value1'})
+
+    def test_prompt_template_params_editor_not_mapping(self):
+        """Testing prompt_template_params falls back to prompts when the
+        editor doesn't produce a mapping
+        """
+        params = [
+            FakeTemplateParam('Key1'),
+        ]
+
+        with self.assertLogs(level='WARNING'):
+            values = self._edit_params(params, lambda content: '- value\n',
+                                       stdin='value1\n')
+
+        self.assertEqual(values, {'Key1': 'value1'})
+
+    def _prompt(self, key, value, **kwargs):
+        """Prompt for a parameter with a default value of "default".
+
+        Args:
+            key (unicode):
+                The parameter key.
+
+            value (unicode):
+                The value to enter.
+
+            **kwargs (dict):
+                Additional arguments for prompt_template_param.
+
+        Returns:
+            unicode:
+            The value chosen for the parameter.
+        """
+        param = FakeTemplateParam(key, 'default')
+
+        with patch('sys.stdin', io.StringIO('%s\n' % value)):
+            return console.prompt_template_param(param, **kwargs)
+
+    def _edit_params(self, params, edit_func, editor_result=0, stdin='',
+                     **kwargs):
+        """Prompt for parameters using a fake editor.
+
+        Args:
+            params (list of FakeTemplateParam):
+                The parameters to prompt for.
+
+            edit_func (callable):
+                A function taking the content of the file to edit, and
+                returning the new content.
+
+            editor_result (int, optional):
+                The exit code of the fake editor.
+
+            stdin (unicode, optional):
+                The input for any prompts.
+
+            **kwargs (dict):
+                Additional arguments for prompt_template_params.
+
+        Returns:
+            collections.OrderedDict:
+            The values chosen for the parameters.
+        """
+        def _call(args):
+            self.assertEqual(args[:2], ['my-editor', '--wait'])
+
+            with open(args[2], 'r') as fp:
+                content = edit_func(fp.read())
+
+            with open(args[2], 'w') as fp:
+                fp.write(content)
+
+            return editor_result
+
+        with patch.dict(os.environ, {'EDITOR': 'my-editor --wait'}), \
+             patch('sys.stdin', FakeTTY(stdin)), \
+             patch('subprocess.call', side_effect=_call):
+            return console.prompt_template_params(params, use_editor=True,
+                                                  **kwargs)
+
+    def _read_cache(self):
+        """Return the remembered values saved to disk.
+
+        Returns:
+            dict:
+            The saved cache.
+        """
+        with open(self.cache_filename, 'r') as fp:
+            return json.load(fp)
+
+    def _reset_cache(self):
+        """Forget the loaded cache, so it's read from disk again."""
+        console._param_cache = None
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-from setuptools import setup, find_packages
+from setuptools import setup
 
 from cloudpuff import get_package_version
 
@@ -8,31 +8,35 @@ from cloudpuff import get_package_version
 PACKAGE_NAME = 'cloudpuff'
 
 
-commands = {
-    'cloudpuff-create-ami': 'create_ami',
-    'cloudpuff-compile-template': 'compile_template',
-    'cloudpuff-launch-stack': 'launch_stack',
-    'cloudpuff-list-stacks': 'list_stacks',
-    'cloudpuff-make-depends': 'make_depends',
-}
+# Command scripts in bin/.
+commands = (
+    'cloudpuff-compile-template',
+    'cloudpuff-create-ami',
+    'cloudpuff-launch-stack',
+    'cloudpuff-list-stacks',
+    'cloudpuff-make-depends',
+)
 
 setup(
     name=PACKAGE_NAME,
     version=get_package_version(),
     description='Powerful tools for working with AWS CloudFormation.',
-    packages=find_packages(),
-    entry_points={
-        'console_scripts': [
-            '%s = cloudpuff.commands.%s:main' % (name, mod)
-            for name, mod in commands.items()
-        ],
-    },
+    packages=[
+        'cloudpuff',
+        'cloudpuff.commands',
+        'cloudpuff.templates',
+        'cloudpuff.utils',
+    ],
+    scripts=[
+        'bin/%s' % name
+        for name in commands
+    ],
     install_requires=[
         'boto',
         'colorama',
         'PyYAML>=3.11',
-        'six',
     ],
+    python_requires='>=3.8',
     maintainer='Christian Hammond',
     maintainer_email='christian@beanbaginc.com'
 )